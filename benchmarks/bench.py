@@ -0,0 +1,261 @@
+'''
+Headless benchmarks of the NavBar and Screensaver hot paths.
+
+Runs offline with the mock GL backend, so no GPU or display is needed. Every
+operation is timed over a number of runs and reported with its allocations: the
+net number of Python memory blocks it leaves allocated, the peak of the memory
+it allocates on the way, and for the NavBar the canvas instructions it creates
+and destroys. The results are written as JSON, to track them over releases.
+
+    python benchmarks/bench.py --output results.json
+    python benchmarks/bench.py --tabs 5,50 --shapes Rectangle --modes batch
+'''
+
+import os
+import sys
+
+# Headless backends, set before kivy is imported
+os.environ.setdefault('KIVY_GL_BACKEND', 'mock')
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+os.environ.setdefault('KIVY_NO_FILELOG', '1')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'lib'))
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+from kivy.graphics.cgl import cgl_init
+cgl_init()
+
+import kivy
+from kivy.clock import Clock
+
+from NavBar.navbar import NavBar, NavBarTabBase
+from Screensaver.screensaver import Screensaver
+from Screensaver.animation import animationDriver
+from Screensaver.motion import SpriteBatch
+
+TAB_COUNTS = (5, 50, 500, 5000)
+SHAPES = ('Rectangle', 'RoundedRectangle')
+
+# NavBar properties of every layout mode
+MODES = {
+    'default': {},
+    'batch': {'batchLayout': True},
+    'virtual': {'virtualizeTabs': True, 'batchRendering': True},
+}
+
+SPRITE_COUNTS = (1, 100, 1000)
+
+def frame():
+    '''
+    Runs one frame of the Clock like the event loop does, applying the
+    triggered layouts before the frame would be drawn.
+    '''
+    Clock.tick()
+    Clock.tick_draw()
+
+def timeOp(op, repeat, budget):
+    '''
+    Returns the durations of op in seconds. op runs at least 3 and at most
+    repeat times, stopping early once budget seconds are spent.
+    '''
+    op()
+    times = []
+    gcEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        spent = 0.0
+        while len(times) < repeat and (len(times) < 3 or spent < budget):
+            start = time.perf_counter()
+            op()
+            elapsed = time.perf_counter() - start
+            times.append(elapsed)
+            spent += elapsed
+    finally:
+        if gcEnabled:
+            gc.enable()
+    return times
+
+def allocations(op, runs):
+    '''
+    Returns the net Python memory blocks left allocated by op and the peak of
+    the memory it allocates, averaged over runs.
+    '''
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    for i in range(runs):
+        op()
+    gc.collect()
+    blocks = sys.getallocatedblocks() - blocks
+
+    tracemalloc.start()
+    try:
+        peak = 0
+        for i in range(runs):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            op()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return blocks / float(runs), peak
+
+def timing(name, params, times):
+    '''
+    Returns the result record of the durations times, in seconds. Every record
+    has the same fields, one-shot measurements included.
+    '''
+    return {
+        'name': name,
+        'params': params,
+        'runs': len(times),
+        'unit': 'us',
+        'min': min(times) * 1e6,
+        'median': statistics.median(times) * 1e6,
+        'mean': statistics.mean(times) * 1e6,
+        'max': max(times) * 1e6,
+    }
+
+def measure(results, name, params, op, args, stats=None):
+    '''
+    Times op and appends its result to results. stats is the graphicsStats of
+    the NavBar under test, if any.
+    '''
+    before = dict(stats) if stats is not None else None
+    times = timeOp(op, args.repeat, args.budget)
+    result = timing(name, params, times)
+    if stats is not None:
+        # The warmup run is counted as well
+        runs = len(times) + 1
+        result['instructionsCreated'] = (stats['created'] - before['created']) / float(runs)
+        result['instructionsDestroyed'] = (stats['destroyed'] - before['destroyed']) / float(runs)
+    if args.alloc:
+        runs = max(1, min(len(times), args.allocRuns))
+        result['blocks'], result['peakBytes'] = allocations(op, runs)
+    results.append(result)
+    if args.verbose:
+        # kivy takes over sys.stderr once its logger is set up
+        sys.__stderr__.write("{:<32} {:<60} {:>12.1f} us\n".format(name, json.dumps(params), result['median']))
+
+def createNavBar(count, shape, mode):
+    bar = NavBar(size_hint=(1.0, 1.0), tabShape=shape, tabRadius=10, extendPastBounds=True, **MODES[mode])
+    bar.add_tabs([NavBarTabBase(text="Tab {}".format(i), fontSize=20) for i in range(count)])
+    frame()
+    return bar
+
+def benchNavBar(results, args):
+    for count in args.tabs:
+        for shape in args.shapes:
+            for mode in args.modes:
+                params = {'tabs': count, 'shape': shape, 'mode': mode}
+                start = time.perf_counter()
+                bar = createNavBar(count, shape, mode)
+                results.append(timing('NavBar.create', params, [time.perf_counter() - start]))
+                stats = bar.graphicsStats
+                tabs = bar.tabs
+
+                measure(results, 'NavBar.do_layout', params, bar.do_layout, args, stats)
+
+                # Alternates between two distant tabs, including the layout it triggers
+                targets = [tabs[count // 2], tabs[0]]
+                def switch():
+                    bar.switch_tab(targets[0])
+                    targets.reverse()
+                    frame()
+                measure(results, 'NavBar.switch_tab', params, switch, args, stats)
+
+                def drawTab():
+                    bar.drawTab(bar.activeTab)
+                measure(results, 'NavBar.drawTab', params, drawTab, args, stats)
+                measure(results, 'NavBar.drawBackground', params, bar.drawBackground, args, stats)
+                measure(results, 'NavBar._findTabs', params, bar._findTabs, args, stats)
+
+                bar.clear_widgets()
+                del bar, tabs, targets
+                frame()
+                gc.collect()
+
+def benchScreensaver(results, args):
+    saver = Screensaver(size_hint=(1.0, 1.0), sleepTime=1e6, fadeTime=0)
+    saver.size = 800, 600
+    frame()
+
+    # A whole sleep and wake, each completing on the next frame
+    def cycle():
+        saver._fadeIn()
+        frame()
+        saver._fadeOut()
+        frame()
+    measure(results, 'Screensaver.fadeCycle', {}, cycle, args)
+
+    # One interpolation frame of a running fade
+    saver.fadeTime = 1e6
+    saver._fadeIn()
+    def fadeFrame():
+        animationDriver._step(0)
+    measure(results, 'Screensaver.fadeFrame', {}, fadeFrame, args)
+    animationDriver.stop(saver)
+    saver._fadeFlag = False
+    saver._stopContent()
+
+    for count in SPRITE_COUNTS:
+        sprites = SpriteBatch(count, (64, 64), 100, 0.0)
+        def step():
+            sprites.step(1 / 60.0, (0, 0), (800, 600))
+        measure(results, 'SpriteBatch.step', {'sprites': count}, step, args)
+
+def parseList(value, type=str):
+    return [type(item) for item in value.split(',') if item]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless benchmarks of the NavBar and Screensaver hot paths.")
+    parser.add_argument('--tabs', type=lambda value: parseList(value, int), default=list(TAB_COUNTS),
+                        help="comma separated tab counts")
+    parser.add_argument('--shapes', type=parseList, default=list(SHAPES),
+                        help="comma separated tab shapes")
+    parser.add_argument('--modes', type=parseList, default=list(MODES),
+                        help="comma separated NavBar layout modes: " + ", ".join(MODES))
+    parser.add_argument('--repeat', type=int, default=100, help="maximum runs of an operation")
+    parser.add_argument('--budget', type=float, default=0.5, help="seconds to spend timing an operation")
+    parser.add_argument('--alloc-runs', dest='allocRuns', type=int, default=10,
+                        help="runs of an operation when counting its allocations")
+    parser.add_argument('--no-alloc', dest='alloc', action='store_false', help="skip counting allocations")
+    parser.add_argument('--only', choices=['navbar', 'screensaver'], help="run a single suite")
+    parser.add_argument('--output', help="file to write the JSON results to, stdout by default")
+    parser.add_argument('--verbose', action='store_true', help="print every result to stderr")
+    args = parser.parse_args(argv)
+    for mode in args.modes:
+        if mode not in MODES:
+            parser.error("unknown mode {}".format(mode))
+
+    # Frames are run back to back, without waiting for the frame rate limit
+    Clock._max_fps = 0
+
+    results = []
+    if args.only != 'screensaver':
+        benchNavBar(results, args)
+    if args.only != 'navbar':
+        benchScreensaver(results, args)
+
+    report = {
+        'python': platform.python_version(),
+        'kivy': kivy.__version__,
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+'''
+Batched rendering of the NavBar tab strip.
+
+Instead of a group of instructions per tab, all the normal tabs are drawn by
+one Mesh, the highlighted tab by a second one and the tab borders by a third,
+each split into a chain of Meshes once it outgrows their 16 bit indices. Each
+tab owns a fixed sub-range of the vertex buffer of its Mesh. Layout passes and
+tab switches rewrite those sub-ranges in place and then flag the Mesh, so no
+instruction is created while the number of drawn tabs does not grow.
+'''
+
+from array import array
+from kivy.graphics import Color, InstructionGroup, Mesh
+
+try:
+    from .tessellation import bodyTriangles, borderTriangles, chevronTriangles
+except ImportError:
+    from tessellation import bodyTriangles, borderTriangles, chevronTriangles
+
+# Mesh indices are unsigned shorts, a Mesh addresses at most this many vertices
+MAX_MESH_VERTICES = 65536
+
+class MeshBatch(object):
+    '''
+    'triangles' Meshes drawing up to `capacity` templates that share the same
+    vertex count and indices. The slots are split over as many Meshes as needed
+    to keep every index within an unsigned short, all held by one group. Empty
+    slots are collapsed to a point.
+    '''
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.group = InstructionGroup()
+        stats['created'] += 1
+        self.meshes = []
+        self.buffers = [array('f')]
+        self._addMesh()
+        self.pattern = None
+        self.capacity = 0
+        self.slotSize = 0
+        self.slotsPerMesh = 1
+        self.dirty = set()
+
+    def reserve(self, template, slots):
+        '''
+        Makes room for `slots` copies of templates shaped like `template`.
+        Returns True if the buffers were reallocated, in which case every slot
+        is empty.
+        '''
+        vertices, indices = template
+        pattern = len(vertices), indices
+        if pattern == self.pattern and slots <= self.capacity:
+            return False
+
+        vertexCount = len(vertices) // 4
+        if vertexCount > MAX_MESH_VERTICES:
+            raise Exception("Tab template of {} vertices does not fit in a Mesh.".format(vertexCount))
+        self.pattern = pattern
+        self.capacity = slots
+        self.slotSize = len(vertices)
+        self.slotsPerMesh = perMesh = MAX_MESH_VERTICES // max(vertexCount, 1)
+        meshCount = max(-(-slots // perMesh), 1)
+
+        # Grow or shrink the chain of Meshes
+        while len(self.meshes) < meshCount:
+            self._addMesh()
+        while len(self.meshes) > meshCount:
+            self.group.remove(self.meshes.pop())
+            self.stats['destroyed'] += 1
+
+        self.buffers = []
+        for i, mesh in enumerate(self.meshes):
+            count = min(perMesh, slots - i * perMesh) if slots else 0
+            self.buffers.append(array('f', bytes(4 * self.slotSize * count)))
+            mesh.indices = [index + slot * vertexCount for slot in range(count) for index in indices]
+        self._empty = array('f', bytes(4 * self.slotSize))
+        self.dirty = set(range(meshCount))
+        return True
+
+    def _addMesh(self):
+        mesh = Mesh(mode='triangles')
+        self.group.add(mesh)
+        self.meshes.append(mesh)
+        self.stats['created'] += 1
+
+    def setSlot(self, slot, template, x, y):
+        vertices = template[0]
+        mesh, slot = divmod(slot, self.slotsPerMesh)
+        start = slot * self.slotSize
+        end = start + self.slotSize
+        buffer = self.buffers[mesh]
+        buffer[start:end:4] = array('f', [vx + x for vx in vertices[0::4]])
+        buffer[start + 1:end:4] = array('f', [vy + y for vy in vertices[1::4]])
+        self.dirty.add(mesh)
+
+    def clearSlot(self, slot):
+        if slot >= self.capacity: return
+        mesh, slot = divmod(slot, self.slotsPerMesh)
+        start = slot * self.slotSize
+        self.buffers[mesh][start:start + self.slotSize] = self._empty
+        self.dirty.add(mesh)
+
+    def flush(self):
+        for mesh in self.dirty:
+            # The Mesh reads the buffer in place, assigning it flags the update
+            self.meshes[mesh].vertices = self.buffers[mesh]
+        self.dirty.clear()
+
+class NavBarStripBatch(object):
+    '''
+    Batched renderer of the tabs of a NavBar. Its meshes are added to the palette
+    layers of the bar, after their shared Color.
+
+    A layout pass calls begin() with the indices of the drawn tabs, setTab() and
+    setChevron() for each of them and end() to upload the changes.
+    '''
+
+    def __init__(self, stats, tabLayer, highlightLayer, borderLayer, chevronLayer):
+        self.normal = MeshBatch(stats)
+        self.highlight = MeshBatch(stats)
+        self.border = MeshBatch(stats)
+        self.chevrons = {}
+        for isLeft in (True, False):
+            self.chevrons[isLeft] = Color(), MeshBatch(stats)
+            stats['created'] += 1
+        self.layers = (
+            (tabLayer, self.normal.group),
+            (highlightLayer, self.highlight.group),
+            (borderLayer, self.border.group),
+        ) + tuple((chevronLayer, instruction) for color, batch in self.chevrons.values() for instruction in (color, batch.group))
+        self.visible = False
+        self.slots = {}
+        self.bodies = {}
+        self.active = None
+        self.bordered = False
+        self._used = 0
+        self._borderUsed = 0
+
+    def show(self, visible):
+        if visible == self.visible: return
+        self.visible = visible
+        for layer, instruction in self.layers:
+            if visible:
+                layer.add(instruction)
+            else:
+                layer.remove(instruction)
+
+    def _batches(self):
+        return (self.normal, self.highlight, self.border) + tuple(batch for color, batch in self.chevrons.values())
+
+    def begin(self, indices, active):
+        self.slots = dict((index, slot) for slot, index in enumerate(indices))
+        self.bodies = {}
+        self.active = active
+        self.bordered = False
+        self.highlight.clearSlot(0)
+        for color, batch in self.chevrons.values():
+            batch.clearSlot(0)
+
+    def setTab(self, index, pos, size, radius, segments, borderThickness=None):
+        '''
+        Draws the tab at `index`, which must have been passed to begin(). If
+        borderThickness is not None, the body is inset and a border is drawn.
+        '''
+        slot = self.slots[index]
+        x, y = pos
+        width, height = size
+        count = len(self.slots)
+
+        self.bordered = borderThickness is not None
+        if borderThickness is not None:
+            border = borderTriangles(width, height, radius, borderThickness, segments)
+            if self.border.reserve(border, count):
+                self._borderUsed = 0
+            self.border.setSlot(slot, border, x, y)
+            x += borderThickness
+            y += borderThickness
+            width -= 2 * borderThickness
+            height -= 2 * borderThickness
+
+        body = bodyTriangles(width, height, radius, segments)
+        self.bodies[index] = body, x, y
+        if self.normal.reserve(body, count):
+            self._used = 0
+        self.highlight.reserve(body, 1)
+        if index == self.active:
+            self.normal.clearSlot(slot)
+            self.highlight.setSlot(0, body, x, y)
+        else:
+            self.normal.setSlot(slot, body, x, y)
+
+    def setChevron(self, isLeft, pos, size, margin, thickness, color):
+        colorInstruction, batch = self.chevrons[isLeft]
+        chevron = chevronTriangles(size[0], size[1], margin[0], margin[1], thickness, isLeft)
+        batch.reserve(chevron, 1)
+        batch.setSlot(0, chevron, pos[0], pos[1])
+        colorInstruction.rgba = color
+
+    def setActive(self, oldIndex, newIndex):
+        '''
+        Moves the highlight between two drawn tabs by rewriting three slots.
+        '''
+        if oldIndex in self.bodies:
+            self.normal.setSlot(self.slots[oldIndex], *self.bodies[oldIndex])
+        self.highlight.clearSlot(0)
+        if newIndex in self.bodies:
+            self.normal.clearSlot(self.slots[newIndex])
+            self.highlight.setSlot(0, *self.bodies[newIndex])
+        self.active = newIndex
+        self.end()
+
+    def end(self):
+        # Collapse the slots left over from a previous, longer pass, and every
+        # border once a pass draws none
+        count = len(self.slots)
+        borders = count if self.bordered else 0
+        for slot in range(count, self._used):
+            self.normal.clearSlot(slot)
+        for slot in range(borders, self._borderUsed):
+            self.border.clearSlot(slot)
+        self._used = count
+        self._borderUsed = borders
+        if not self.bodies.get(self.active):
+            self.highlight.clearSlot(0)
+        for batch in self._batches():
+            batch.flush()
@@ -0,0 +1,255 @@
+'''
+Tab geometry for the NavBar.
+
+This module has no Kivy dependency. Positions are relative to the bottom left
+corner of the tab bar so that a layout can be shared by every bar of the same
+size, and layouts are memoized on their inputs so that repeated layout passes
+with unchanged inputs cost a dictionary lookup.
+
+When NumPy is installed, layoutTabs(..., batch=True) computes the layout of
+all tabs in a single vectorized pass, which is much faster for bars holding
+thousands of tabs.
+'''
+
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from math import ceil, floor
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Tab visibility classes
+OUT_OF_BOUNDS = 0
+IN_BOUNDS = 1
+HALF_LEFT = 2
+HALF_RIGHT = 3
+
+def limit(value, min, max):
+    if min is not None and value < min: value = min
+    elif max is not None and value > max: value = max
+    return value
+
+def calcTabSizeHint(numOfTabs, tabSpacing, tabSizeHint, extendPastBounds):
+    '''
+    Returns the (tabSpacing, tabSizeHint, tabSpacingHint) of a bar holding
+    numOfTabs tabs. All values are fractions of the bar size.
+    '''
+    # Make sure tab spacing is in range [0,1] or 0.1 if not specified
+    if tabSpacing is None:
+        tabSpacing = 0.1
+    else:
+        tabSpacing = limit(tabSpacing, 0.0, 1.0)
+
+    tabWidth, tabHeight = tabSizeHint
+
+    # Calculate tab sizes based on layout style
+    if extendPastBounds:
+        # Tabs should be allowed to exit the bounds of the control
+        if tabWidth is None:
+            # Allow space for 4 tabs at a time by default
+            tabWidth = 1.0 / (4 * (1 + tabSpacing) + tabSpacing)
+
+        if tabHeight is None:
+            # Fill entire vertical space
+            tabHeight = 1.0
+
+        tabSizeHint = limit(tabWidth, 0.0, 1.0), limit(tabHeight, 0.0, 1.0)
+        tabSpacingHint = (1.0 - 4 * tabWidth) / (5)
+    else:
+        # Tabs should be contained within the bounds of the control. DO NOT use the user defined tab size recommendations.
+        tabWidth = 1.0 / (numOfTabs * (1.0 + tabSpacing) + tabSpacing)
+
+        if tabHeight is None:
+            # Fill entire vertical space
+            tabHeight = 1.0
+        else:
+            # Fill vertical space to specified limit
+            tabHeight = limit(tabHeight, 0.0, 1.0)
+        tabSizeHint = tabWidth, tabHeight
+        tabSpacingHint = (1.0 - numOfTabs * tabWidth) / (numOfTabs + 1)
+
+    return tabSpacing, tabSizeHint, tabSpacingHint
+
+class TabLayout(object):
+    '''
+    Geometry of every tab in a bar. Tab i sits at x[i] = origin + i * pitch
+    and y, is width by height in size and its visibility class is state[i].
+    visible holds the indices of the tabs that are at least partly in bounds.
+
+    Layouts are shared through the cache and must not be modified.
+    '''
+
+    __slots__ = ('count', 'x', 'y', 'width', 'height', 'spacing', 'origin', 'pitch', 'state', 'visible')
+
+    def __init__(self, count, x, y, width, height, spacing, origin, pitch, state, visible):
+        self.count = count
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.spacing = spacing
+        self.origin = origin
+        self.pitch = pitch
+        self.state = state
+        self.visible = visible
+
+def classifyTab(tabX, tabWidth, width):
+    '''
+    Returns the visibility class of a tab starting at tabX in a bar of the
+    given width.
+    '''
+    if tabX < 0 and tabX + tabWidth > 0:
+        return HALF_LEFT
+    elif tabX + tabWidth > width and tabX < width:
+        return HALF_RIGHT
+    elif tabX >= 0 and tabX + tabWidth <= width:
+        return IN_BOUNDS
+    return OUT_OF_BOUNDS
+
+def calcTabOrigin(numOfTabs, width, tabWidth, spacing, activeTab, extendPastBounds):
+    '''
+    Returns the x position of the first tab relative to the bar.
+    '''
+    elementWidth = tabWidth + spacing
+
+    # Calculate tab position if tabs are anchored to either the left or right
+    distFromLeft = spacing + activeTab * elementWidth
+    distFromRight = (numOfTabs - activeTab) * elementWidth
+    halfWidth = 0.5 * width
+
+    # Determine tab justification
+    if distFromLeft < halfWidth or not extendPastBounds:
+        # Left justify tabs
+        return spacing
+    elif distFromRight < halfWidth:
+        # Right justify tabs
+        return width - numOfTabs * elementWidth
+    # Center justify on active tab
+    return (width - tabWidth) / 2 - activeTab * elementWidth
+
+def tabRange(numOfTabs, width, tabWidth, pitch, lowOrigin, highOrigin):
+    '''
+    Returns the (first, last) indices of the tabs that are at least partly in
+    bounds for some origin between lowOrigin and highOrigin, i.e. the tabs seen
+    while the strip scrolls between the two.
+    '''
+    if numOfTabs == 0 or pitch <= 0:
+        return 0, numOfTabs - 1
+    first = max(int(floor((-tabWidth - highOrigin) / pitch)) + 1, 0)
+    last = min(int(ceil((width - lowOrigin) / pitch)) - 1, numOfTabs - 1)
+    return first, last
+
+def originBounds(numOfTabs, width, tabWidth, spacing):
+    '''
+    Returns the (low, high) range of tab origins between the right and the left
+    justified strip.
+    '''
+    high = spacing
+    low = width - numOfTabs * (tabWidth + spacing)
+    return min(low, high), high
+
+def boundsSignature(numOfTabs, width, tabWidth, pitch, origin):
+    '''
+    Returns the (first, last) visible and (first, last) fully visible tab
+    indices of a strip starting at origin. It changes whenever a tab changes
+    visibility class as the strip moves.
+    '''
+    first, last = tabRange(numOfTabs, width, tabWidth, pitch, origin, origin)
+    if pitch <= 0:
+        return first, last, first, last
+    firstFull = max(int(ceil(-origin / pitch)), 0)
+    lastFull = min(int(floor((width - tabWidth - origin) / pitch)), numOfTabs - 1)
+    return first, last, firstFull, lastFull
+
+def hitTest(layout, x):
+    '''
+    Returns the index of the tab of layout under x, relative to the bar, or
+    None. The tab offsets are sorted, so this is a binary search.
+    '''
+    offsets = layout.x
+    if numpy is not None and isinstance(offsets, numpy.ndarray):
+        index = int(numpy.searchsorted(offsets, x, side='right')) - 1
+    else:
+        index = bisect_right(offsets, x) - 1
+    if index < 0 or x >= offsets[index] + layout.width:
+        return None
+    return index
+
+def layoutTabs(numOfTabs, barSize, tabSpacingHint, tabSizeHint, activeTab, extendPastBounds, valign, batch=False, origin=None):
+    '''
+    Returns the TabLayout of numOfTabs tabs in a bar of barSize. barSize and
+    tabSizeHint must be tuples.
+
+    If batch is True and NumPy is available, the x, state and visible fields
+    are NumPy arrays computed in one vectorized pass. If origin is not None,
+    the strip starts at origin instead of being justified on the active tab.
+    '''
+    if not extendPastBounds:
+        # Tabs are always left justified, so the active tab has no influence
+        activeTab = 0
+        origin = None
+    elif origin is not None:
+        activeTab = 0
+    if batch and numpy is not None:
+        return _layoutTabsBatch(numOfTabs, barSize, tabSpacingHint, tabSizeHint, activeTab, extendPastBounds, valign, origin)
+    return _layoutTabs(numOfTabs, barSize, tabSpacingHint, tabSizeHint, activeTab, extendPastBounds, valign, origin)
+
+def _calcTabMetrics(barSize, tabSpacingHint, tabSizeHint, valign):
+    width, height = barSize
+
+    # Tab size and spacing
+    tabWidth = width * tabSizeHint[0]
+    tabHeight = height * tabSizeHint[1]
+    spacing = tabSpacingHint * width
+    pitch = tabWidth + spacing
+
+    # Vertical location
+    verticalSpacing = (height - tabHeight) / 2.0
+    if valign == 'top':
+        tabY = 2 * verticalSpacing
+    elif valign == 'center':
+        tabY = verticalSpacing
+    else:
+        tabY = 0.0
+
+    return tabY, tabWidth, tabHeight, spacing, pitch
+
+@lru_cache(maxsize=128)
+def _layoutTabs(numOfTabs, barSize, tabSpacingHint, tabSizeHint, activeTab, extendPastBounds, valign, origin):
+    width = barSize[0]
+    tabY, tabWidth, tabHeight, spacing, pitch = _calcTabMetrics(barSize, tabSpacingHint, tabSizeHint, valign)
+
+    if origin is None:
+        origin = calcTabOrigin(numOfTabs, width, tabWidth, spacing, activeTab, extendPastBounds)
+    x = array('d', [origin + index * pitch for index in range(numOfTabs)])
+    state = array('b', [classifyTab(tabX, tabWidth, width) for tabX in x])
+    visible = array('l', [index for index in range(numOfTabs) if state[index] != OUT_OF_BOUNDS])
+    return TabLayout(numOfTabs, x, tabY, tabWidth, tabHeight, spacing, origin, pitch, state, visible)
+
+@lru_cache(maxsize=32)
+def _layoutTabsBatch(numOfTabs, barSize, tabSpacingHint, tabSizeHint, activeTab, extendPastBounds, valign, origin):
+    width = barSize[0]
+    tabY, tabWidth, tabHeight, spacing, pitch = _calcTabMetrics(barSize, tabSpacingHint, tabSizeHint, valign)
+
+    if origin is None:
+        origin = calcTabOrigin(numOfTabs, width, tabWidth, spacing, activeTab, extendPastBounds)
+    x = origin + numpy.arange(numOfTabs, dtype=numpy.float64) * pitch
+    right = x + tabWidth
+
+    # Same precedence as classifyTab, lowest priority first
+    state = numpy.full(numOfTabs, OUT_OF_BOUNDS, dtype=numpy.int8)
+    state[(x >= 0) & (right <= width)] = IN_BOUNDS
+    state[(right > width) & (x < width)] = HALF_RIGHT
+    state[(x < 0) & (right > 0)] = HALF_LEFT
+    visible = numpy.flatnonzero(state)
+    return TabLayout(numOfTabs, x, tabY, tabWidth, tabHeight, spacing, origin, pitch, state, visible)
+
+def cacheInfo():
+    return _layoutTabs.cache_info(), _layoutTabsBatch.cache_info()
+
+def clearCache():
+    _layoutTabs.cache_clear()
+    _layoutTabsBatch.cache_clear()
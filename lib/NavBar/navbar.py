@@ -1,9 +1,13 @@
 from ctypes import sizeof
 
 from typing import List
+from collections import OrderedDict
+import time
+import math
 from kivy.app import App
 from kivy.graphics import *
 from kivy.graphics.instructions import *
+from kivy.graphics.scissor_instructions import ScissorPush, ScissorPop
 from kivy.uix.relativelayout import RelativeLayout
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.uix.layout import Layout
@@ -26,6 +30,17 @@ from kivy.properties import (
     DictProperty
 )
 
+try:
+    from .geometry import HALF_LEFT, HALF_RIGHT, IN_BOUNDS, OUT_OF_BOUNDS, boundsSignature, calcTabSizeHint, hitTest, layoutTabs, limit, originBounds, tabRange
+    from .tessellation import chevronPoints, roundedRectMesh, roundedRectBorderMesh
+    from .batch import NavBarStripBatch
+    from .textcache import CachedLabel, sharedTextureCache
+except ImportError:
+    from geometry import HALF_LEFT, HALF_RIGHT, IN_BOUNDS, OUT_OF_BOUNDS, boundsSignature, calcTabSizeHint, hitTest, layoutTabs, limit, originBounds, tabRange
+    from tessellation import chevronPoints, roundedRectMesh, roundedRectBorderMesh
+    from batch import NavBarStripBatch
+    from textcache import CachedLabel, sharedTextureCache
+
 class NavBarTabBase(RelativeLayout):
     text = StringProperty("Tab")
     fontSize = NumericProperty(5)
@@ -35,19 +50,153 @@ class NavBarTabBase(RelativeLayout):
     halign = OptionProperty('auto', options=['left', 'center', 'right', 'justify', 'auto'])
     valign = OptionProperty('bottom', options=['bottom', 'middle', 'center', 'top'])
     textSize = ListProperty([None,None])
+    factory = ObjectProperty(None, allownone=True)
 
     def __init__(self, **kwargs):
         super(NavBarTabBase, self).__init__(**kwargs)
-        self.fbind('text', self.update)
-        self.fbind('textSize', self.update)
+        self.built = self.factory is None
+        self._factoryBuilt = False
+        self.navBar = None
+        # Offset of the tab during a slide transition, applied before its position
+        self._transitionTranslate = Translate()
+        self.canvas.before.insert(1, self._transitionTranslate)
+        for name in ('text', 'fontSize', 'textColor', 'bold', 'underline', 'halign', 'valign', 'textSize'):
+            self.fbind(name, self.update)
+        self.fbind('factory', self._factoryChanged)
+
+    def _factoryChanged(self, *largs):
+        # A factory assigned after construction still builds the content on
+        # the next activation, unless a factory already built it
+        if not self._factoryBuilt:
+            self.built = self.factory is None
 
     def update(self, *largs, **kwargs):
-        pass
+        '''
+        Marks the tab as changed in the NavBar it is registered with, which
+        updates its label once per frame.
+        '''
+        if self.navBar is not None:
+            self.navBar._markTabDirty(self)
+
+    def build(self):
+        '''
+        Builds the tab content with the factory, if it was not built yet. The
+        factory is called without arguments and returns the content widget.
+        '''
+        if self.built: return
+        self.built = True
+        self._factoryBuilt = True
+        content = self.factory()
+        if content is not None:
+            self.add_widget(content)
         
     def enable(self, enabled):
         if enabled: self.opacity = 1.0
         else: self.opacity = 0.0
 
+class NavBarTabGraphic(object):
+    '''
+    Retained canvas instructions for a single tab in the bar. The instructions
+    are created once when the tab is registered and the layout pass only moves
+    and resizes them. They are rebuilt when the tab shape or border style of the
+    bar changes.
+
+    The body and border groups hold no Color. The NavBar adds them to layers
+    that start with the Color shared by all tabs of the same palette role.
+
+    Rounded tabs and their borders are a single Mesh each, filled from the
+    cached vertex templates of the tessellation module and moved into place
+    with a Translate.
+    '''
+
+    def __init__(self, stats, shape="Rectangle", borderEnable=False):
+        self.stats = stats
+        self.body = InstructionGroup()
+        self.border = InstructionGroup()
+        self.chevron = InstructionGroup()
+        self.shape = None
+        self.borderEnable = None
+        self.visible = False
+        self.highlight = False
+        self._count = 0
+        self.build(shape, borderEnable)
+
+    def _create(self, group, instruction):
+        group.add(instruction)
+        self._count += 1
+        self.stats['created'] += 1
+        return instruction
+
+    def build(self, shape, borderEnable):
+        if shape == self.shape and borderEnable == self.borderEnable:
+            return
+        if shape not in ("Rectangle", "RoundedRectangle"):
+            raise Exception("Requested Tab background shape not implemented!!! tabShape = {} is not a valid keyword.".format(shape))
+        self.release()
+        self.shape = shape
+        self.borderEnable = borderEnable
+
+        create = self._create
+        body = self.body
+        border = self.border
+        self._bodyKey = None
+        self._borderKey = None
+        if shape == "Rectangle":
+            self.bodyRect = create(body, Rectangle())
+            if borderEnable:
+                self.borderLine = create(border, Line())
+        else:
+            create(body, PushMatrix())
+            self.bodyTranslate = create(body, Translate())
+            self.bodyMesh = create(body, Mesh(mode='triangle_fan'))
+            create(body, PopMatrix())
+            if borderEnable:
+                create(border, PushMatrix())
+                self.borderTranslate = create(border, Translate())
+                self.borderMesh = create(border, Mesh(mode='triangle_strip'))
+                create(border, PopMatrix())
+        self.chevronColor = create(self.chevron, Color())
+        self.chevronLine = create(self.chevron, Line(points=[]))
+
+    def release(self):
+        self.body.clear()
+        self.border.clear()
+        self.chevron.clear()
+        self.stats['destroyed'] += self._count
+        self._count = 0
+
+    def setFill(self, pos, size, radius=0, segments=10):
+        if self.shape == "Rectangle":
+            self.bodyRect.pos = pos
+            self.bodyRect.size = size
+            return
+        key = size[0], size[1], radius, segments
+        if key != self._bodyKey:
+            self._bodyKey = key
+            self.bodyMesh.vertices, self.bodyMesh.indices = roundedRectMesh(*key)
+        self.bodyTranslate.xy = pos
+
+    def setBorder(self, pos, size, thickness, radius=0, segments=10):
+        if not self.borderEnable: return
+        if self.shape == "Rectangle":
+            self.borderLine.width = thickness
+            self.borderLine.rectangle = pos[0] + thickness, pos[1] + thickness, size[0] - thickness * 2, size[1] - thickness * 2
+            return
+        key = size[0], size[1], radius, thickness, segments
+        if key != self._borderKey:
+            self._borderKey = key
+            self.borderMesh.vertices, self.borderMesh.indices = roundedRectBorderMesh(*key)
+        self.borderTranslate.xy = pos
+
+    def setChevron(self, points, thickness, color):
+        self.chevronColor.rgba = color
+        self.chevronLine.width = thickness
+        self.chevronLine.points = points
+
+    def clearChevron(self):
+        if self.chevronLine.points:
+            self.chevronLine.points = []
+
 class NavBar(Layout):
     # Tabs
     tabs = ListProperty([])
@@ -55,16 +204,34 @@ class NavBar(Layout):
     tabSizeHint = ListProperty([None, None])
     tabShape = StringProperty("Rectangle")
     tabRadius = NumericProperty(5)
+    tabSegments = NumericProperty(10)
     tabBorderThickness = NumericProperty(5)
     tabBorderEnable = BooleanProperty(False)
     tabBarHeight = NumericProperty(0.1)
     valign = OptionProperty('center', options=['top', 'center','bottom'])
     tabFontSize = NumericProperty(None)
     tabWidthReduction = NumericProperty(0.5)
+    textureCache = ObjectProperty(sharedTextureCache, allownone=True)
+    instrumentation = ObjectProperty(None, allownone=True)
 
     # Positioning and size
     orientToTop = BooleanProperty(True)
     extendPastBounds = BooleanProperty(False)
+    scrollTabs = BooleanProperty(False)
+    scrollDuration = NumericProperty(0.25)
+    scrollX = NumericProperty(0.0)
+    dragThreshold = NumericProperty(10)
+    scrollFriction = NumericProperty(4.0)
+    batchLayout = BooleanProperty(False)
+    batchRendering = BooleanProperty(False)
+    virtualizeTabs = BooleanProperty(False)
+    detachInactiveTabs = BooleanProperty(False)
+    tabCacheSize = NumericProperty(0)
+    prebuildNeighbours = NumericProperty(0)
+    coalesceNavigation = BooleanProperty(False)
+    contentSwapInterval = NumericProperty(0)
+    transition = OptionProperty('none', options=['none', 'fade', 'slide'])
+    transitionDuration = NumericProperty(0.25)
     removeIncompleteTabs = BooleanProperty(False)
     chevronMargin = ListProperty([20,10])
     chevronWidth = NumericProperty(5)
@@ -98,26 +265,123 @@ class NavBar(Layout):
         self.tabSize = [10,10]
         self.activeTab = 0
         self.labels = {}
-        self._tabsFound = False
+        self.tabGraphics = {}
+        self.graphicsStats = {'created': 0, 'destroyed': 0}
+        self._tabIndex = {}
+        self._bulkTabs = None
         self._tabSpacingHint = 0.0
+        self._layout = None
+        self._drawnTabs = set()
+        self._stripBatch = None
+        self._slotPool = []
+        self._detachedTabs = set()
+        self._recentTabs = OrderedDict()
+        self._newTabs = []
+        self._dirtyTabs = set()
+        self._triggerTabUpdate = Clock.create_trigger(self._updateDirtyTabs, -1)
+        self._prebuildQueue = []
+        self._prebuildEvent = None
+        self._shownTab = None
+        self._navTarget = None
+        self._contentEvent = None
+        self._lastContentSwap = 0.0
+        self._transitionOut = None
+        self._transitionIn = None
+        self._transitionStart = 0.0
+        self._transitionDirection = 1
+        self._transitionEvent = None
+        self._stripOrigin = 0.0
+        self._scrollStart = 0.0
+        self._scrollTarget = 0.0
+        self._scrollTime = 0.0
+        self._scrollEvent = None
+        self._scrollRange = None
+        self._dragTouch = None
+        self._dragOrigin = None
+        self._dragSignature = None
+        self._dragSamples = []
+        self._dragVelocity = 0.0
+        self._momentumEvent = None
+        self._triggerNavigation = Clock.create_trigger(self._applyNavigation, -1)
+        self._instrumentation = None
         self.loaded = False
+
+        # Retained background instructions
+        self._background = InstructionGroup()
+        self._contentColor = Color()
+        self._contentRect = Rectangle()
+        self._barColor = Color()
+        self._barRect = Rectangle()
+        for instruction in (self._contentColor, self._contentRect, self._barColor, self._barRect):
+            self._background.add(instruction)
+        self.graphicsStats['created'] += 4
+        self.canvas.before.add(self._background)
+
+        # Tab layers, each starting with the Color shared by its palette role
+        self._tabColor = Color()
+        self._highlightColor = Color()
+        self._tabBorderColor = Color()
+        self._tabLayer = InstructionGroup()
+        self._highlightLayer = InstructionGroup()
+        self._borderLayer = InstructionGroup()
+        self._chevronLayer = InstructionGroup()
+        self._tabLayer.add(self._tabColor)
+        self._highlightLayer.add(self._highlightColor)
+        self._borderLayer.add(self._tabBorderColor)
+        self.graphicsStats['created'] += 3
+
+        # The tab strip is clipped to the bar and scrolled by a single Translate
+        self._stripClip = ScissorPush()
+        self._stripTranslate = Translate()
+        strip = [self._stripClip, PushMatrix(), self._stripTranslate,
+                 self._tabLayer, self._highlightLayer, self._borderLayer, self._chevronLayer,
+                 PopMatrix(), ScissorPop()]
+        for instruction in strip:
+            self.canvas.before.add(instruction)
+        self.graphicsStats['created'] += 5
+        self._updateColors()
+
+        # Tab labels are drawn by a child widget clipped and scrolled the same way
+        self._labelStrip = Widget()
+        self._labelClip = ScissorPush()
+        self._labelTranslate = Translate()
+        for instruction in (self._labelClip, PushMatrix(), self._labelTranslate):
+            self._labelStrip.canvas.before.add(instruction)
+        self._labelStrip.canvas.after.add(PopMatrix())
+        self._labelStrip.canvas.after.add(ScissorPop())
+        self.graphicsStats['created'] += 5
+        self.add_widget(self._labelStrip)
         
         # Create bindings
         fbind = self.fbind
         update = self._trigger_layout
-        findTabs = self._findTabs
-        fbind('_tabsFound', update)
         fbind('orientToTop', update)
         fbind('extendPastBounds', update)
-        fbind('backgroundColor', update)
-        fbind('tabBackgroundColor', update)
-        fbind('tabColor', update)
-        fbind('tabBorderColor', update)
-        fbind('highlightColor', update)
-        fbind('children', findTabs)
+        fbind('scrollTabs', update)
+        fbind('scrollX', self._applyScroll)
+        fbind('batchLayout', update)
+        fbind('batchRendering', self._batchRenderingChanged)
+        fbind('virtualizeTabs', self._virtualizeChanged)
+        fbind('detachInactiveTabs', self._detachChanged)
+        fbind('tabCacheSize', self._trimRecentTabs)
+        fbind('textureCache', self._textureCacheChanged)
+        fbind('instrumentation', self._instrumentationChanged)
+        fbind('tabShape', update)
+        fbind('tabSegments', update)
+        fbind('tabBorderEnable', update)
+        updateColors = self._updateColors
+        fbind('backgroundColor', updateColors)
+        fbind('tabBackgroundColor', updateColors)
+        fbind('tabColor', updateColors)
+        fbind('tabBorderColor', updateColors)
+        fbind('highlightColor', updateColors)
         fbind('size', update)
         fbind('pos', update)
         fbind('size_hint', update)
+        if self.batchRendering:
+            self._batchRenderingChanged()
+        if self.instrumentation is not None:
+            self._instrumentationChanged()
         
     def _update_size(self, *largs, **kwargs):
         # Extract kwargs
@@ -148,50 +412,490 @@ class NavBar(Layout):
         # Assign self.size
         self.size = width, height
 
+    def add_widget(self, widget, *largs, **kwargs):
+        if isinstance(widget, NavBarTabBase):
+            # Tabs are sized by the layout pass itself, so unlike the Layout
+            # children their size changes must not trigger another pass
+            super(Layout, self).add_widget(widget, *largs, **kwargs)
+        else:
+            super(NavBar, self).add_widget(widget, *largs, **kwargs)
+        if isinstance(widget, NavBarTabBase) and widget not in self._tabIndex:
+            if self._bulkTabs is not None:
+                self._bulkTabs.append(widget)
+            else:
+                self._registerTabs([widget])
+
+    def remove_widget(self, widget, *largs, **kwargs):
+        if widget in self._detachedTabs:
+            # A detached tab is not a child, only its registration is removed
+            self._detachedTabs.discard(widget)
+        else:
+            super(NavBar, self).remove_widget(widget, *largs, **kwargs)
+        if widget in self._tabIndex:
+            self._unregisterTab(widget)
+
+    def clear_widgets(self, children=None):
+        if children is None or children is self.children:
+            # Keep the label strip and clear the detached tabs as well
+            children = [child for child in self.children if child is not self._labelStrip]
+            children += [tab for tab in self.tabs if tab in self._detachedTabs]
+        super(NavBar, self).clear_widgets(children)
+
+    def add_tabs(self, tabs):
+        '''
+        Adds and registers many tabs at once, with a single update of the tab
+        list and a single layout pass.
+        '''
+        self._bulkTabs = bulkTabs = []
+        try:
+            for tab in tabs:
+                self.add_widget(tab)
+        finally:
+            self._bulkTabs = None
+        self._registerTabs(bulkTabs)
+
+    def _registerTabs(self, newTabs):
+        if not newTabs: return
+        index = len(self.tabs)
+        for tab in newTabs:
+            tab.enable(False)
+            tab.navBar = self
+            self._tabIndex[tab] = index
+            index += 1
+        self.tabs.extend(newTabs)
+
+        for tab in newTabs:
+            if not self.virtualizeTabs:
+                self._bindTabSlot(tab)
+            if self.detachInactiveTabs:
+                # Detached on the next layout pass, together with the rest of the batch
+                self._newTabs.append(tab)
+        self._trigger_layout()
+
+    def _unregisterTab(self, tab):
+        if tab is self._transitionIn or tab is self._transitionOut:
+            self._finishTransition()
+        index = self._tabIndex.pop(tab)
+        del self.tabs[index]
+        for i in range(index, len(self.tabs)):
+            self._tabIndex[self.tabs[i]] = i
+
+        tab.navBar = None
+        self._drawnTabs.discard(tab)
+        self._dirtyTabs.discard(tab)
+        self._recentTabs.pop(tab, None)
+        graphic = self.tabGraphics.pop(tab, None)
+        if graphic is not None:
+            self._showTabGraphic(graphic, False)
+            graphic.release()
+        label = self.labels.pop(tab, None)
+        if label is not None:
+            self._labelStrip.remove_widget(label)
+
+        # Keep the active tab, or activate its neighbour if it was removed
+        if index < self.activeTab:
+            self.activeTab -= 1
+        elif index == self.activeTab and self.tabs:
+            self.activeTab = min(self.activeTab, len(self.tabs) - 1)
+        if tab is self._shownTab:
+            self._shownTab = None
+            if self.tabs:
+                self._swapContent(self.tabs[self.activeTab])
+        self._trigger_layout()
+
     def _findTabs(self, *largs, **kwargs):
-        self.activeTab = 0
-        firstFind = self.tabs == 0
-        
-        # Search children for NavBarTabs
-        for child in self.children:
-            if isinstance(child, NavBarTabBase) and not child in self.tabs:
-                # NavBarTab found. Add to tabs.
-                child.enable(False)
-                self.tabs.append(child)
-                if not(child in self.labels):
-                    self.labels[child] = Label(
-                        text=child.text,
-                        font_size=child.fontSize,
-                        color=child.textColor,
-                        valign=child.valign,
-                        halign=child.halign,
-                        underline=child.underline,
-                        bold=child.bold,
-                        text_size=child.textSize
-                    )
-                    self.add_widget(self.labels[child])
-        if firstFind: 
-            self.tabs.reverse()
-            self.tabs[0].enable(True)
-        self._tabsFound = not self._tabsFound
+        '''
+        Resynchronizes the registered tabs with the children of the bar.
+        '''
+        children = set(self.children)
+        for tab in [tab for tab in self.tabs if tab not in children and tab not in self._detachedTabs]:
+            self._unregisterTab(tab)
+        self._registerTabs([child for child in reversed(self.children)
+                            if isinstance(child, NavBarTabBase) and child not in self._tabIndex])
+
+    def _createTabLabel(self, tab):
+        # Blank until the tab is drawn, which sets the text and position
+        label = CachedLabel(
+            textureCache=self.textureCache,
+            text="",
+            font_size=tab.fontSize,
+            color=tab.textColor,
+            valign=tab.valign,
+            halign=tab.halign,
+            underline=tab.underline,
+            bold=tab.bold,
+            text_size=tab.textSize
+        )
+        label.instrumentation = self._instrumentation
+        return label
+
+    def _configureTabLabel(self, label, tab):
+        label.font_size = tab.fontSize
+        label.color = tab.textColor
+        label.valign = tab.valign
+        label.halign = tab.halign
+        label.underline = tab.underline
+        label.bold = tab.bold
+        label.text_size = tab.textSize
+
+    def _textureCacheChanged(self, *largs):
+        for label in list(self.labels.values()) + [label for label, graphic in self._slotPool]:
+            label.textureCache = self.textureCache
+
+    def _instrumentationChanged(self, *largs):
+        # Read from a plain attribute by the probes, which is cheaper
+        self._instrumentation = self.instrumentation
+        for label in list(self.labels.values()) + [label for label, graphic in self._slotPool]:
+            label.instrumentation = self._instrumentation
+
+    def getStats(self):
+        '''
+        Returns a snapshot of the canvas instructions created and destroyed by
+        the bar and, if instrumentation is set, of its counters and timers.
+        '''
+        stats = {'instructions': dict(self.graphicsStats)}
+        if self._instrumentation is not None:
+            stats.update(self._instrumentation.snapshot())
+        return stats
+
+    def _markTabDirty(self, tab):
+        self._dirtyTabs.add(tab)
+        self._triggerTabUpdate()
+
+    def _updateDirtyTabs(self, *largs):
+        '''
+        Applies the property changes of the tabs marked dirty since the last
+        frame. Only their labels are updated and only the drawn ones are redrawn,
+        without a layout pass.
+        '''
+        if self._instrumentation is not None: self._instrumentation.count('clock._updateDirtyTabs')
+        dirty = self._dirtyTabs
+        self._dirtyTabs = set()
+        layout = self._layout
+        redraw = layout is not None and layout.count == len(self.tabs)
+        batch = self._stripBatch if self.batchRendering else None
+        for tab in dirty:
+            label = self.labels.get(tab)
+            if label is None or tab not in self._tabIndex: continue
+            self._configureTabLabel(label, tab)
+            if self.tabFontSize is not None:
+                label.font_size = self.tabFontSize
+            if redraw and tab in self._drawnTabs:
+                self.drawTab(self._tabIndex[tab])
+        if batch is not None and redraw:
+            batch.end()
+
+    def _bindTabSlot(self, tab):
+        '''
+        Gives a tab the label and canvas group it is drawn with. When tabs are
+        virtualized the pair is recycled from a tab that left the bounds.
+        '''
+        if tab in self.tabGraphics: return
+        if self._slotPool:
+            label, graphic = self._slotPool.pop()
+            self._configureTabLabel(label, tab)
+        else:
+            label = self._createTabLabel(tab)
+            graphic = NavBarTabGraphic(self.graphicsStats, self.tabShape, self.tabBorderEnable)
+            self._labelStrip.add_widget(label)
+        self.labels[tab] = label
+        self.tabGraphics[tab] = graphic
+
+    def _releaseTabSlot(self, tab):
+        graphic = self.tabGraphics.pop(tab, None)
+        label = self.labels.pop(tab, None)
+        if graphic is None: return
+        self._showTabGraphic(graphic, False)
+        label.text = ""
+        self._slotPool.append((label, graphic))
+
+    def _trimSlotPool(self, size):
+        if len(self._slotPool) <= size: return
+        slots = self._slotPool[size:]
+        del self._slotPool[size:]
+        for label, graphic in slots:
+            graphic.release()
+        for label, graphic in slots:
+            self._labelStrip.remove_widget(label)
+
+    def _virtualizeChanged(self, *largs):
+        if self.virtualizeTabs:
+            for tab in [tab for tab in self.tabGraphics if tab not in self._drawnTabs]:
+                self._releaseTabSlot(tab)
+        else:
+            for tab in self.tabs:
+                self._bindTabSlot(tab)
+        self._trigger_layout()
+
+    def _batchRenderingChanged(self, *largs):
+        if self.batchRendering:
+            if self._stripBatch is None:
+                self._stripBatch = NavBarStripBatch(self.graphicsStats, self._tabLayer, self._highlightLayer,
+                                                    self._borderLayer, self._chevronLayer)
+            for graphic in self.tabGraphics.values():
+                self._showTabGraphic(graphic, False)
+            self._stripBatch.show(True)
+        elif self._stripBatch is not None:
+            self._stripBatch.show(False)
+        self._trigger_layout()
 
     def real_remove_widget(self, screen):
         self.remove_widget(screen)
         self._manager.real_remove_widget(screen)
 
-    def switch_tab(self, tab):
-        oldTab = self.tabs[self.activeTab]
-        oldTab.enable(False)
+    def _attachTab(self, tab):
+        if tab not in self._detachedTabs: return
+        self._detachedTabs.discard(tab)
+        tab.size = self.contentSize
+        tab.pos = self.contentPos
+        self.add_widget(tab)
+
+    def _detachTab(self, tab):
+        if tab in self._detachedTabs or tab.parent is not self: return
+        self._detachedTabs.add(tab)
+        super(NavBar, self).remove_widget(tab)
+
+    def _trimRecentTabs(self, *largs):
+        '''
+        Detaches the least recently used inactive tabs that do not fit in the
+        tab cache.
+        '''
+        if not self.detachInactiveTabs: return
+        recent = self._recentTabs
+        while len(recent) > max(int(self.tabCacheSize), 0):
+            tab, _ = recent.popitem(last=False)
+            self._detachTab(tab)
+
+    def _detachChanged(self, *largs):
+        if self.detachInactiveTabs:
+            current = self._shownTab
+            for tab in self.tabs:
+                if tab is not current:
+                    self._detachTab(tab)
+        else:
+            for tab in list(self._detachedTabs):
+                self._attachTab(tab)
+            self._recentTabs.clear()
+        self._newTabs = []
+
+    def _deactivateTab(self, tab):
+        tab.enable(False)
+        if self.detachInactiveTabs:
+            self._recentTabs[tab] = True
+            self._recentTabs.move_to_end(tab)
+            self._trimRecentTabs()
+
+    def _activateTab(self, tab):
+        self._recentTabs.pop(tab, None)
+        self._attachTab(tab)
+        tab.build()
         tab.enable(True)
-        if tab in self.tabs:
-            self.activeTab = self.tabs.index(tab)
-        self._trigger_layout()
+
+    def _queuePrebuild(self):
+        '''
+        Queues the content of the unbuilt tabs around the active tab to be built
+        one per frame.
+        '''
+        numOfTabs = len(self.tabs)
+        queue = []
+        for distance in range(1, int(self.prebuildNeighbours) + 1):
+            for index in (self.activeTab + distance, self.activeTab - distance):
+                if 0 <= index < numOfTabs and not self.tabs[index].built:
+                    queue.append(self.tabs[index])
+        self._prebuildQueue = queue
+        if queue and self._prebuildEvent is None:
+            self._prebuildEvent = Clock.schedule_once(self._prebuildNext, 0)
+
+    def _prebuildNext(self, dt):
+        if self._instrumentation is not None: self._instrumentation.count('clock._prebuildNext')
+        self._prebuildEvent = None
+        while self._prebuildQueue:
+            tab = self._prebuildQueue.pop(0)
+            if not tab.built and tab in self._tabIndex:
+                tab.build()
+                break
+        if self._prebuildQueue:
+            self._prebuildEvent = Clock.schedule_once(self._prebuildNext, 0)
+
+    def add_tab(self, text, factory, **kwargs):
+        '''
+        Registers a tab with only its title. The tab content is built by calling
+        factory the first time the tab is activated, or during idle frames if it
+        is within prebuildNeighbours of the active tab.
+        '''
+        tab = NavBarTabBase(text=text, factory=factory, **kwargs)
+        self.add_widget(tab)
+        return tab
+
+    def switch_tab(self, tab):
+        if self.coalesceNavigation and tab in self._tabIndex:
+            # Applied once, before the next frame
+            self._navTarget = self._tabIndex[tab]
+            self._triggerNavigation()
+        else:
+            self._applySwitch(tab)
+
+    def _applySwitch(self, tab, swapContent=True):
+        oldIndex = self.activeTab
+        # Scroll back from a dragged strip to the active tab
+        self._stopMomentum()
+        self._dragOrigin = None
+        if tab in self._tabIndex:
+            self.activeTab = self._tabIndex[tab]
+        if swapContent:
+            self._swapContent(tab)
+        if not self._switchHighlight(oldIndex):
+            self._trigger_layout()
+
+    def _swapContent(self, tab):
+        oldTab = self._shownTab
+        self._activateTab(tab)
+        if oldTab is not None and oldTab is not tab:
+            if self.transition != 'none':
+                self._startTransition(oldTab, tab)
+            else:
+                self._finishTransition()
+                self._deactivateTab(oldTab)
+        self._shownTab = tab
+        self._lastContentSwap = time.monotonic()
+        if self.prebuildNeighbours > 0:
+            self._queuePrebuild()
+
+    def _transitionProgress(self):
+        duration = self.transitionDuration
+        if duration <= 0:
+            return 1.0
+        return (time.monotonic() - self._transitionStart) / duration
+
+    def _startTransition(self, oldTab, newTab):
+        '''
+        Starts animating from oldTab to newTab. A transition in progress is
+        retargeted instead of queued: going back to its outgoing tab reverses
+        it, and any other target continues from the more visible of its tabs.
+        '''
+        if self._transitionEvent is not None:
+            progress = limit(self._transitionProgress(), 0.0, 1.0)
+            outgoing, incoming = self._transitionOut, self._transitionIn
+            if newTab is outgoing:
+                # Play the transition backwards from where it is
+                self._transitionOut, self._transitionIn = incoming, outgoing
+                self._transitionStart = time.monotonic() - (1.0 - progress) * self.transitionDuration
+                self._transitionDirection = -self._transitionDirection
+                return
+            keep, drop = (incoming, outgoing) if progress >= 0.5 else (outgoing, incoming)
+            self._resetTransitionTab(drop)
+            self._deactivateTab(drop)
+            oldTab = keep
+
+        self._transitionOut = oldTab
+        self._transitionIn = newTab
+        self._transitionStart = time.monotonic()
+        self._transitionDirection = 1 if self._tabIndex.get(newTab, 0) >= self._tabIndex.get(oldTab, 0) else -1
+        if self._transitionEvent is None:
+            self._transitionEvent = Clock.schedule_interval(self._transitionStep, 0)
+        self._transitionStep(0)
+
+    def _transitionStep(self, dt):
+        '''
+        Single Clock callback of the transitions. Only the canvas opacity and
+        the transition Translate of the two tabs are animated.
+        '''
+        if self._instrumentation is not None: self._instrumentation.count('clock._transitionStep')
+        progress = self._transitionProgress()
+        if progress >= 1.0:
+            self._finishTransition()
+            return False
+        # Symmetric easing, so that a reversed transition does not jump
+        eased = progress * progress * (3.0 - 2.0 * progress)
+        outgoing, incoming = self._transitionOut, self._transitionIn
+        if self.transition == 'slide':
+            width = self.contentSize[0] * self._transitionDirection
+            outgoing._transitionTranslate.x = -width * eased
+            incoming._transitionTranslate.x = width * (1.0 - eased)
+        else:
+            outgoing.canvas.opacity = 1.0 - eased
+            incoming.canvas.opacity = eased
+
+    def _finishTransition(self):
+        if self._transitionEvent is not None:
+            self._transitionEvent.cancel()
+            self._transitionEvent = None
+        outgoing, incoming = self._transitionOut, self._transitionIn
+        self._transitionOut = self._transitionIn = None
+        for tab in (outgoing, incoming):
+            if tab is not None:
+                self._resetTransitionTab(tab)
+        if outgoing is not None and outgoing is not self._shownTab:
+            self._deactivateTab(outgoing)
+
+    def _resetTransitionTab(self, tab):
+        tab._transitionTranslate.x = 0.0
+        tab.canvas.opacity = tab.opacity
+
+    def _applyNavigation(self, *largs):
+        '''
+        Applies the net result of all the navigation requests of a frame. The
+        content swap is delayed if the previous one happened less than
+        contentSwapInterval seconds ago.
+        '''
+        if self._instrumentation is not None: self._instrumentation.count('clock._applyNavigation')
+        target = self._navTarget
+        self._navTarget = None
+        if target is None or not self.tabs: return
+        tab = self.tabs[min(target, len(self.tabs) - 1)]
+
+        wait = self._lastContentSwap + self.contentSwapInterval - time.monotonic()
+        if wait > 0:
+            self._applySwitch(tab, False)
+            if self._contentEvent is None:
+                self._contentEvent = Clock.schedule_once(self._applyContentSwap, wait)
+        else:
+            if self._contentEvent is not None:
+                self._contentEvent.cancel()
+                self._contentEvent = None
+            self._applySwitch(tab)
+
+    def _applyContentSwap(self, dt):
+        if self._instrumentation is not None: self._instrumentation.count('clock._applyContentSwap')
+        self._contentEvent = None
+        if self.tabs:
+            self._swapContent(self.tabs[self.activeTab])
+
+    def _navigationIndex(self):
+        if self._navTarget is not None:
+            return self._navTarget
+        return self.activeTab
+
+    def _switchHighlight(self, oldIndex):
+        '''
+        Fast path for a tab switch that does not scroll the bar. Only the colors
+        of the previous and the new active tab are updated. Returns False if a
+        full layout pass is needed instead.
+        '''
+        layout = self._layout
+        if not self.loaded or layout is None or layout.count != len(self.tabs):
+            return False
+        newLayout = self._calcTabLayout()
+        if newLayout.origin != layout.origin:
+            return False
+        self._layout = newLayout
+        if self.batchRendering:
+            self._stripBatch.setActive(oldIndex, self.activeTab)
+        else:
+            self._recolorTab(oldIndex)
+            self._recolorTab(self.activeTab)
+        return True
+
+    def _recolorTab(self, index):
+        graphic = self.tabGraphics.get(self.tabs[index])
+        if graphic is None or not graphic.visible: return
+        self._showTabGraphic(graphic, True, index == self.activeTab)
 
     def getCurrent(self):
         return self.tabs[self.activeTab]
 
     def next(self):
-        newIndex = self.activeTab + 1
+        newIndex = self._navigationIndex() + 1
         if newIndex > len(self.tabs) - 1:
             newIndex = 0
         elif newIndex < 0:
@@ -199,103 +903,321 @@ class NavBar(Layout):
         self.switch_tab(self.tabs[newIndex])
 
     def prev(self):
-        newIndex = self.activeTab - 1
+        newIndex = self._navigationIndex() - 1
         if newIndex > len(self.tabs) - 1:
             newIndex = 0
         elif newIndex < 0:
             newIndex = len(self.tabs) - 1
         self.switch_tab(self.tabs[newIndex])
         
+    ################################################ TOUCH METHODS ################################################
+
+    def _barCollide(self, x, y):
+        bx, by = self.barPos
+        width, height = self.barSize
+        return bx <= x < bx + width and by <= y < by + height
+
+    def on_touch_down(self, touch):
+        if self._dragTouch is not None or not self.tabs or not self._barCollide(*touch.pos):
+            return super(NavBar, self).on_touch_down(touch)
+        self._stopMomentum()
+        touch.grab(self)
+        self._dragTouch = touch
+        self._dragStart = touch.x
+        self._dragSamples = [(time.monotonic(), touch.x)]
+        self._dragging = False
+        return True
+
+    def on_touch_move(self, touch):
+        if touch.grab_current is not self:
+            return super(NavBar, self).on_touch_move(touch)
+        if touch is not self._dragTouch: return True
+        offset = touch.x - self._dragStart
+        if not self._dragging:
+            if abs(offset) < self.dragThreshold or not self.extendPastBounds or self._layout is None:
+                return True
+            # Start from where the strip is drawn, which may be mid scroll
+            self._dragging = True
+            self._dragStart = touch.x
+            self._dragStartOrigin = self._stripTranslate.x - self._stripOrigin + self._layout.origin
+            self._dragSignature = None
+            offset = 0.0
+
+        now = time.monotonic()
+        samples = self._dragSamples
+        samples.append((now, touch.x))
+        while len(samples) > 2 and now - samples[0][0] > 0.1:
+            samples.pop(0)
+        self._dragTo(self._dragStartOrigin + offset)
+        return True
+
+    def on_touch_up(self, touch):
+        if touch.grab_current is not self:
+            return super(NavBar, self).on_touch_up(touch)
+        touch.ungrab(self)
+        if touch is not self._dragTouch: return True
+        self._dragTouch = None
+
+        if self._dragging:
+            # Keep scrolling with the release velocity of the drag
+            (startTime, startX), (endTime, endX) = self._dragSamples[0], self._dragSamples[-1]
+            if endTime > startTime:
+                self._dragVelocity = (endX - startX) / (endTime - startTime)
+                self._momentumEvent = Clock.schedule_interval(self._momentumStep, 0)
+        elif self._layout is not None:
+            # Tap, find the tab under the touch in layout coordinates
+            x = touch.x - self.barPos[0] - self._stripTranslate.x + self._stripOrigin
+            index = hitTest(self._layout, x)
+            if index is not None and index < len(self.tabs):
+                self.switch_tab(self.tabs[index])
+        return True
+
+    def _dragTo(self, origin):
+        '''
+        Moves the strip to start at origin, within the bounds of the justified
+        strip, and returns the new origin. In scrollTabs mode only scrollX is
+        updated until a tab changes visibility class.
+        '''
+        layout = self._layout
+        low, high = originBounds(layout.count, self.barSize[0], layout.width, layout.spacing)
+        origin = limit(origin, low, high)
+        self._dragOrigin = origin
+        if self.scrollTabs:
+            self._stopScroll()
+            self.scrollX = origin
+            signature = boundsSignature(layout.count, self.barSize[0], layout.width, layout.pitch, origin)
+            if signature == self._dragSignature:
+                return origin
+            self._dragSignature = signature
+        self._trigger_layout()
+        return origin
+
+    def _momentumStep(self, dt):
+        if self._instrumentation is not None: self._instrumentation.count('clock._momentumStep')
+        # Exact integration of an exponentially decaying velocity, so the
+        # distance travelled does not depend on the frame rate
+        friction = self.scrollFriction
+        velocity = self._dragVelocity
+        if friction > 0:
+            decay = math.exp(-friction * dt)
+            distance = velocity * (1.0 - decay) / friction
+        else:
+            decay = 1.0
+            distance = velocity * dt
+        self._dragVelocity = velocity * decay
+
+        if self._dragOrigin is None or self._layout is None:
+            self._stopMomentum()
+            return False
+        origin = self._dragOrigin + distance
+        if self._dragTo(origin) != origin or abs(self._dragVelocity) < 10.0:
+            # Stopped by the bounds or slowed down to a halt
+            self._stopMomentum()
+            return False
+
+    def _stopMomentum(self):
+        if self._momentumEvent is not None:
+            self._momentumEvent.cancel()
+            self._momentumEvent = None
+        self._dragVelocity = 0.0
+
     ################################################ UPDATE METHODS ################################################
 
     def do_layout(self, *largs, **kwargs):
-        self.canvas.before.clear()
+        stats = self._instrumentation
+        if stats is not None:
+            stats.count('layouts')
+            stats.begin()
         self._update_size()
+        if stats is not None: stats.lap('_update_size')
         self._calcTabSize()
+        if stats is not None: stats.lap('_calcTabSize')
         self.drawBackground()
 
-        #self.drawChevron([200,200], [200,200], [10,10], 20, True, [1,0,0,1])
-
         if not self.loaded and len(self.tabs) > 0:
             self.loaded = True
-            self.switch_tab(self.tabs[0])
-
-        for tab in self.tabs:
+            # Only the content is shown here, this pass draws the highlight
+            self._swapContent(self.tabs[self.activeTab])
+
+        if self._newTabs:
+            # Take newly registered inactive tabs out of the widget tree
+            current = self._shownTab
+            for tab in self._newTabs:
+                if tab is not current and tab in self._tabIndex:
+                    self._detachTab(tab)
+            self._newTabs = []
+
+        previous = self._layout
+        if stats is not None: stats.lap('setup')
+        self._layout = self._calcTabLayout()
+        if stats is not None: stats.lap('_calcTabLayout')
+        self._updateScroll(previous)
+        visible = self._visibleTabs()
+        batch = self._stripBatch if self.batchRendering else None
+        if batch is not None:
+            batch.begin(visible, self.activeTab)
+
+        if self.batchLayout or self.virtualizeTabs:
+            self._layoutVisibleTabs(visible)
+            if batch is not None:
+                batch.end()
+            if stats is not None:
+                stats.lap('draw')
+                stats.end('do_layout')
+            return
+
+        for index, tab in enumerate(self.tabs):
             # Draw tabs in bar
-            self.drawTab(self.tabs.index(tab))
+            self.drawTab(index)
             
             # Update tab content space
-            tab.size = self.contentSize
-            tab.pos = self.contentPos
+            if tab.parent is self:
+                tab.size = self.contentSize
+                tab.pos = self.contentPos
 
             # Update tab text size
             if self.tabFontSize is not None:
                 self.labels[tab].font_size = self.tabFontSize
+        self._drawnTabs = set(self.tabs[index] for index in visible)
+        if batch is not None:
+            batch.end()
+        if stats is not None:
+            stats.lap('draw')
+            stats.end('do_layout')
+
+    def _layoutVisibleTabs(self, visible):
+        '''
+        Batched layout pass. Only the tabs that are at least partly in bounds are
+        drawn and only the active tab content is resized, so the cost of a pass
+        scales with the number of visible tabs rather than the number of tabs.
+
+        When tabs are virtualized, only the drawn tabs own a label and canvas
+        group. Tabs leaving the bounds return theirs to a pool that the tabs
+        entering the bounds are bound from.
+        '''
+        tabs = self.tabs
+        virtualize = self.virtualizeTabs
+        drawn = set(tabs[index] for index in visible)
+
+        # Hide the tabs that left the bounds since the last pass
+        for tab in self._drawnTabs - drawn:
+            if virtualize:
+                self._releaseTabSlot(tab)
+            else:
+                self._hideTab(tab)
+        self._drawnTabs = drawn
 
-    def _calcTabSize(self):
-        # Make sure tab spacing is in range [0,1] or 0.1 if not specified
-        if self.tabSpacing is None:
-            self.tabSpacing = 0.1
-        else:
-            self.tabSpacing = self._limit(self.tabSpacing, 0.0, 1.0)
-
-        tabWidth, tabHeight = self.tabSizeHint
-        
-        # Calculate tab sizes based on layout style
-        if self.extendPastBounds:
-            # Tabs should be allowed to exit the bounds of the control
-            if tabWidth is None:
-                # Allow space for 4 tabs at a time by default
-                tabWidth = 1.0 / (4 * (1 + self.tabSpacing) + self.tabSpacing)
-                
-            if tabHeight is None:
-                # Fill entire vertical space
-                tabHeight = 1.0
-            
-            self.tabSizeHint = self._limit(tabWidth, 0.0, 1.0), self._limit(tabHeight, 0.0, 1.0)
-            self._tabSpacingHint = (1.0 - 4 * tabWidth) / (5)
-        else:
-            # Tabs should be contained within the bounds of the control. DO NOT use the user defined tab size recommendations.
-            numOfChildren = len(self.tabs)
+        for index in visible:
+            tab = tabs[index]
+            if virtualize:
+                self._bindTabSlot(tab)
 
-            # Calculate tab width hint
-            tabWidth = 1.0 / (numOfChildren * (1.0 + self.tabSpacing) + self.tabSpacing)
-            
-            if tabHeight is None:
-                # Fill entire vertical space
-                tabHeight = 1.0
-            else:
-                # Fill vertical space to specified limit
-                tabHeight = self._limit(self.tabSizeHint[1], 0.0, 1.0)
-            self.tabSizeHint = tabWidth, tabHeight
-            self._tabSpacingHint = (1.0 - numOfChildren * tabWidth) / (numOfChildren + 1)
+            # Draw tabs in bar
+            self.drawTab(index)
 
-    ################################################ DRAW METHODS ################################################
+            # Update tab text size
+            if self.tabFontSize is not None:
+                self.labels[tab].font_size = self.tabFontSize
 
-    def drawChevron(self, pos, size, margin, thickness, isleft, color):
-        x,y = pos
-        width,height = size
-        mw,mh = margin
+        if virtualize:
+            # Keep the pool no larger than the drawn window
+            self._trimSlotPool(len(drawn))
 
-        xVerts = [x+mw, x+width-mw-thickness, x+width-mw, x+mw+thickness, x+width-mw, x+width-mw-thickness, x+mw]
-        yVerts = [y+height/2, y+height-mh, y+height-mh, y+height/2, y+mh, y+mh, y+height/2]
+        # Update the content space of the only visible tab
+        tab = self._shownTab
+        if tab is not None:
+            tab.size = self.contentSize
+            tab.pos = self.contentPos
 
-        boundX = x + width/2
-        boundY = y + height/2
+    def _visibleTabs(self):
+        '''
+        Returns the indices of the tabs to draw: the tabs in bounds, or while the
+        strip scrolls, the tabs in the bar at the current scrollX.
+        '''
+        if self._scrollRange is None:
+            return self._layout.visible.tolist()
+        first, last = self._scrollRange
+        return list(range(first, last + 1))
+
+    def _updateScroll(self, previous):
+        '''
+        In scrollTabs mode the tabs are drawn in strip space, relative to the
+        origin of the layout, and the strip is moved into place by setting
+        scrollX. A change of origin that is not caused by a resize is animated
+        over scrollDuration seconds, with one scrollX update per frame.
+        '''
+        layout = self._layout
+        if not self.scrollTabs:
+            self._stopScroll()
+            self._stripOrigin = 0.0
+            self.scrollX = 0.0
+            return
+
+        target = layout.origin
+        self._stripOrigin = target
+        animate = (self.loaded and self.scrollDuration > 0 and previous is not None
+                   and previous.count == layout.count and previous.pitch == layout.pitch
+                   and previous.width == layout.width and previous.origin == self._scrollTarget)
+        if not animate or target == self.scrollX:
+            self._stopScroll()
+            self._scrollTarget = target
+            self.scrollX = target
+            return
+
+        if target != self._scrollTarget or self._scrollEvent is None:
+            self._scrollStart = self.scrollX
+            self._scrollTarget = target
+            self._scrollTime = time.monotonic()
+            if self._scrollEvent is None:
+                self._scrollEvent = Clock.schedule_interval(self._scrollStep, 0)
+        self._scrollRange = self._scrollWindow(self.scrollX)
+
+    def _scrollWindow(self, origin):
+        '''
+        Returns the (first, last) indices of the tabs in the bar when the strip
+        is scrolled to origin.
+        '''
+        layout = self._layout
+        return tabRange(layout.count, self.barSize[0], layout.width, layout.pitch, origin, origin)
+
+    def _scrollStep(self, dt):
+        if self._instrumentation is not None: self._instrumentation.count('clock._scrollStep')
+        progress = (time.monotonic() - self._scrollTime) / self.scrollDuration
+        if progress >= 1.0:
+            self._stopScroll()
+            self.scrollX = self._scrollTarget
+            # Drop the tabs that scrolled out of bounds
+            self._trigger_layout()
+            return False
+        progress = 1.0 - (1.0 - progress) ** 3
+        self.scrollX = self._scrollStart + (self._scrollTarget - self._scrollStart) * progress
+        window = self._scrollWindow(self.scrollX)
+        if window != self._scrollRange:
+            # Draw the tabs that scrolled into the bar and drop the ones that
+            # left it, in a layout pass that runs before this frame is drawn
+            self._scrollRange = window
+            self._trigger_layout()
+
+    def _stopScroll(self):
+        if self._scrollEvent is not None:
+            self._scrollEvent.cancel()
+            self._scrollEvent = None
+        self._scrollRange = None
+
+    def _applyScroll(self, *largs):
+        self._stripTranslate.x = self.scrollX
+        self._labelTranslate.x = self.scrollX
 
-        if isleft is False:
-            for i in range(len(xVerts)):
-                xVerts[i] = self.invertX(boundX, xVerts[i])
+    def _calcTabSize(self):
+        self.tabSpacing, self.tabSizeHint, self._tabSpacingHint = calcTabSizeHint(
+            len(self.tabs), self.tabSpacing, tuple(self.tabSizeHint), self.extendPastBounds)
 
-        verts = xVerts + yVerts
-        verts[::2] = xVerts
-        verts[1::2] = yVerts
+    def _calcTabLayout(self):
+        return layoutTabs(
+            len(self.tabs), tuple(self.barSize), self._tabSpacingHint, tuple(self.tabSizeHint),
+            self.activeTab, self.extendPastBounds, self.valign, self.batchLayout, self._dragOrigin)
 
-        canvas = self.canvas.before
-        chevron = InstructionGroup()
-        chevron.add(Color(rgba=color))
-        chevron.add(Line(points=verts, width=thickness))
-        canvas.add(chevron)
+    ################################################ DRAW METHODS ################################################
 
     def invertX(self, centerX, x):
         return centerX - (x - centerX)
@@ -306,187 +1228,176 @@ class NavBar(Layout):
         bbx, bby = boundBoxCenter
         y = bby - (y - bby)
 
+    # Immediate mode helpers, kept for compatibility. The bar draws with retained
+    # instructions, each call adds a new group to canvas.before and returns it.
+
+    def _drawGroup(self, color, *instructions):
+        group = InstructionGroup()
+        group.add(Color(rgba=color))
+        for instruction in instructions:
+            group.add(instruction)
+        self.canvas.before.add(group)
+        return group
+
+    def drawChevron(self, pos, size, margin, thickness, isleft, color):
+        verts = chevronPoints(pos, size, margin, thickness, isleft)
+        return self._drawGroup(color, Line(points=verts, width=thickness))
+
     def drawRect(self, pos, size, color):
-        canvas = self.canvas.before
-        rect = InstructionGroup()
-        rect.add(Color(rgba=color))
-        rect.add(Rectangle(pos=pos, size=size))
-        canvas.add(rect)
+        return self._drawGroup(color, Rectangle(pos=pos, size=size))
 
     def drawRoundedRect(self, pos, size, color, radius):
-        # Split components
-        x,y = pos
-        width, height = size
-
-        # Calculate key verticies
-        vA = x, y
-        vB = x + width - 2*radius, y
-        vC = x + width - 2*radius, y + height - 2*radius
-        vD = x, y + height - 2*radius
-        v1 = x + radius, y
-        v2 = x + width - radius, y + radius
-        v3 = x + radius, y + height - radius
-        v4 = x, y + radius
-        v5 = x + radius, y + radius
-
-        # Calculate dimensions
-        innerWidth = width - 2 * radius
-        innerHeight = height - 2 * radius
-        circleSize = radius * 2, radius * 2
-
-        # Create Instruction Group
-        rect = InstructionGroup()
-        rect.add(Color(rgba=color))                                     # Color setting
-        rect.add(Ellipse(pos=vA, size=circleSize))                      # Lower Left Circle
-        rect.add(Ellipse(pos=vB, size=circleSize))                      # Lower Right Circle
-        rect.add(Ellipse(pos=vC, size=circleSize))                      # Upper Right Circle
-        rect.add(Ellipse(pos=vD, size=circleSize))                      # Upper Left Circle
-        rect.add(Rectangle(pos=v1, size=(innerWidth, radius)))          # Bottom Edge
-        rect.add(Rectangle(pos=v2, size=(radius, innerHeight)))         # Right Edge
-        rect.add(Rectangle(pos=v3, size=(innerWidth, radius)))          # Top Edge
-        rect.add(Rectangle(pos=v4, size=(radius, innerHeight)))         # Left Edge
-        rect.add(Rectangle(pos=v5, size=(innerWidth, innerHeight)))     # Middle Fill
-       
-        # Draw to canvas
-        canvas = self.canvas.before
-        canvas.add(rect)
+        vertices, indices = roundedRectMesh(size[0], size[1], radius, int(self.tabSegments))
+        return self._drawGroup(color, PushMatrix(), Translate(*pos),
+                               Mesh(vertices=vertices, indices=indices, mode='triangle_fan'), PopMatrix())
 
     def drawRectBorder(self, pos, size, thickness, color):
-        canvas = self.canvas.before
-        rect = InstructionGroup()
-        rect.add(Color(rgba=color))
-        rect.add(Line(rectangle=(pos[0] + thickness,pos[1] + thickness,size[0] - thickness * 2, size[1] - thickness * 2), width=thickness))
-        canvas.add(rect)
+        return self._drawGroup(color, Line(rectangle=(pos[0] + thickness,pos[1] + thickness,size[0] - thickness * 2, size[1] - thickness * 2), width=thickness))
 
     def drawRoundRectBorder(self, pos, size, thickness, color, radius):
-        canvas = self.canvas.before
-        rect = InstructionGroup()
-        rect.add(Color(rgba=color))
-        rect.add(Line(rounded_rectangle=(pos[0] + thickness,pos[1] + thickness,size[0] - thickness * 2, size[1] - thickness * 2, radius), width=thickness))
-        canvas.add(rect)
+        vertices, indices = roundedRectBorderMesh(size[0], size[1], radius, thickness, int(self.tabSegments))
+        return self._drawGroup(color, PushMatrix(), Translate(*pos),
+                               Mesh(vertices=vertices, indices=indices, mode='triangle_strip'), PopMatrix())
 
     def drawBackground(self):
-        self.drawRect(self.contentPos, self.contentSize, self.backgroundColor)
-        self.drawRect(self.barPos, self.barSize, self.tabBackgroundColor)
+        self._contentRect.pos = self.contentPos
+        self._contentRect.size = self.contentSize
+        self._barRect.pos = self.barPos
+        self._barRect.size = self.barSize
+        for clip in (self._stripClip, self._labelClip):
+            clip.pos = self.barPos
+            clip.size = self.barSize
+
+    def _updateColors(self, *largs):
+        '''
+        Applies the color scheme to the shared Color instructions. No layout is
+        needed and the cost does not depend on the number of tabs.
+        '''
+        self._contentColor.rgba = self.backgroundColor
+        self._barColor.rgba = self.tabBackgroundColor
+        self._tabColor.rgba = self.tabColor
+        self._highlightColor.rgba = self.highlightColor
+        self._tabBorderColor.rgba = self.tabBorderColor
+
+    def _showTabGraphic(self, graphic, visible, highlight=False):
+        if visible and graphic.visible:
+            if graphic.highlight != highlight:
+                # Move the body to the layer of its new palette role
+                (self._highlightLayer if graphic.highlight else self._tabLayer).remove(graphic.body)
+                (self._highlightLayer if highlight else self._tabLayer).add(graphic.body)
+                graphic.highlight = highlight
+            return
+        if graphic.visible == visible: return
+
+        if visible:
+            graphic.highlight = highlight
+            (self._highlightLayer if highlight else self._tabLayer).add(graphic.body)
+            self._borderLayer.add(graphic.border)
+            self._chevronLayer.add(graphic.chevron)
+        else:
+            (self._highlightLayer if graphic.highlight else self._tabLayer).remove(graphic.body)
+            self._borderLayer.remove(graphic.border)
+            self._chevronLayer.remove(graphic.chevron)
+        graphic.visible = visible
+
+    def _hideTab(self, tab):
+        graphic = self.tabGraphics.get(tab)
+        if graphic is not None:
+            self._showTabGraphic(graphic, False)
+        if tab in self.labels:
+            self.labels[tab].text = ""
 
     def drawTab(self, index, text=""):
-        # NavBar size and location
-        x, y = self.barPos
-        width, height = self.barSize
+        if self._instrumentation is not None: self._instrumentation.count('tabsDrawn')
+        layout = self._layout
+        if layout is None or layout.count != len(self.tabs):
+            layout = self._layout = self._calcTabLayout()
 
         # Tab size and location
-        tabWidth = width * self.tabSizeHint[0]
-        tabHeight = height * self.tabSizeHint[1]
-        tabX, tabY = x, y
-        color = self.tabColor
-        if index == self.activeTab: color = self.highlightColor
-
-        # Calculate tab width, spacing, and Y location
-        numOfTabs = len(self.tabs)
-        spacing = self._tabSpacingHint * width
-        elementWidth = tabWidth + spacing
-        verticalSpacing = (height - tabHeight) / 2.0
-        if self.valign == 'top':
-            tabY = y + 2 * verticalSpacing
-        elif self.valign == 'center':
-            tabY = y + verticalSpacing
-        else:
-            tabY = y
-
-        # Calculate tab position if tabs are anchored to either the left or right
-        distFromLeft = spacing + self.activeTab * elementWidth
-        distFromRight = (numOfTabs - self.activeTab) * elementWidth
-        halfWidth = 0.5 * width
-
-        # Determine tab justification
-        if distFromLeft < halfWidth or not self.extendPastBounds:
-            # Left justify tabs
-            tabX = x + spacing + index * elementWidth
-        elif distFromRight < halfWidth:
-            # Right justify tabs
-            tabX = (x + width) - (numOfTabs - index) * elementWidth
-        else:
-            # Center justify on active tab
-            activeX = (x + width - tabWidth) / 2
-            displacement = index - self.activeTab
-            tabX = activeX + displacement * elementWidth
+        x, y = self.barPos
+        tabX = x + float(layout.x[index]) - self._stripOrigin
+        tabY = y + layout.y
+        tabWidth, tabHeight = layout.width, layout.height
+        highlight = index == self.activeTab
 
         # Determine if the tab is in or out of bounds
-        if tabX < x and tabX + tabWidth > x:
+        tab = self.tabs[index]
+        state = layout.state[index]
+        if self._scrollRange is not None:
+            # While the strip scrolls, the tabs in the bar are drawn whole and
+            # the others are hidden
+            first, last = self._scrollRange
+            state = IN_BOUNDS if first <= index <= last else OUT_OF_BOUNDS
+        if state == HALF_LEFT:
             # tab half in left bounds
-            self._drawHalfTab([tabX, tabY], [tabWidth, tabHeight], color, 2, True, index)
-        elif tabX + tabWidth > x + width and tabX < x + width:
+            self._drawHalfTab([tabX, tabY], [tabWidth, tabHeight], highlight, 2, True, index)
+        elif state == HALF_RIGHT:
             # out half in right bounds
-            self._drawHalfTab([tabX, tabY], [tabWidth, tabHeight], color, 2, False, index)
-        elif tabX >= x and tabX + tabWidth <= x + width:
+            self._drawHalfTab([tabX, tabY], [tabWidth, tabHeight], highlight, 2, False, index)
+        elif state == IN_BOUNDS:
             # tab fully in bounds
-            self._drawFullTab([tabX,tabY], [tabWidth, tabHeight], text, color, index)
+            self._drawFullTab([tabX,tabY], [tabWidth, tabHeight], text, highlight, index)
         else:
             # Tab fully out of bounds
-            tab = self.tabs[index]
+            self._showTabGraphic(self.tabGraphics[tab], False)
             if tab in self.labels:
                 tabLabel = self.labels[tab]
                 tabLabel.text = ""
                 tabLabel.pos = tabX,tabY
                 tabLabel.size = tabWidth,tabHeight
 
-    def _drawFullTab(self, pos, size, text, color, index):
+    def _drawTabShape(self, graphic, pos, size, highlight, index):
         tabX, tabY = pos
         tabWidth, tabHeight = size
 
-        if self.tabShape == "Rectangle":
-            if self.tabBorderEnable:
-                thickness = self.tabBorderThickness
-                self.drawRect((tabX + thickness, tabY + thickness), (tabWidth - 2 * thickness,tabHeight - 2 * thickness), color)
-                self.drawRectBorder((tabX,tabY), (tabWidth,tabHeight), thickness, self.tabBorderColor)
-            else:
-                self.drawRect((tabX,tabY), (tabWidth,tabHeight), color)
-        elif self.tabShape == "RoundedRectangle":
-            
-            if self.tabBorderEnable:
-                thickness = self.tabBorderThickness
-                self.drawRoundedRect((tabX + thickness, tabY + thickness), (tabWidth - 2 * thickness,tabHeight - 2 * thickness), color, self.tabRadius)
-                self.drawRoundRectBorder((tabX,tabY), (tabWidth,tabHeight), self.tabBorderThickness, self.tabBorderColor, self.tabRadius)
-            else:
-                self.drawRoundedRect((tabX,tabY), (tabWidth,tabHeight), color, self.tabRadius)
+        if self.batchRendering:
+            # Written into the strip batch, the tab graphic stays hidden
+            if self.tabShape not in ("Rectangle", "RoundedRectangle"):
+                raise Exception("Requested Tab background shape not implemented!!! tabShape = {} is not a valid keyword.".format(self.tabShape))
+            radius = self.tabRadius if self.tabShape == "RoundedRectangle" else 0
+            thickness = self.tabBorderThickness if self.tabBorderEnable else None
+            self._stripBatch.setTab(index, pos, size, radius, int(self.tabSegments), thickness)
+            return
+
+        graphic.build(self.tabShape, self.tabBorderEnable)
+        radius = self.tabRadius if graphic.shape == "RoundedRectangle" else 0
+        segments = int(self.tabSegments)
+        if self.tabBorderEnable:
+            thickness = self.tabBorderThickness
+            graphic.setFill((tabX + thickness, tabY + thickness), (tabWidth - 2 * thickness,tabHeight - 2 * thickness), radius, segments)
+            graphic.setBorder((tabX,tabY), (tabWidth,tabHeight), thickness, radius, segments)
         else:
-            raise Exception("Requested Tab background shape not implemented!!! tabShape = {} is not a valid keyword.".format(self.tabShape))
+            graphic.setFill((tabX,tabY), (tabWidth,tabHeight), radius, segments)
+        self._showTabGraphic(graphic, True, highlight)
+
+    def _drawFullTab(self, pos, size, text, highlight, index):
+        tabX, tabY = pos
+        tabWidth, tabHeight = size
 
-        # Display Text
         tab = self.tabs[index]
+        graphic = self.tabGraphics[tab]
+        self._drawTabShape(graphic, pos, size, highlight, index)
+        graphic.clearChevron()
+
+        # Display Text
         if tab in self.labels:
             tabLabel = self.labels[tab]
             tabLabel.text = tab.text
             tabLabel.pos = tabX,tabY
             tabLabel.size = tabWidth,tabHeight
 
-    def _drawHalfTab(self, pos, size, color, chevronWidth, isLeft, index):
+    def _drawHalfTab(self, pos, size, highlight, chevronWidth, isLeft, index):
         tabX, tabY = pos
         tabWidth, tabHeight = size
         tabWidth *= self.tabWidthReduction
         if isLeft:
             tabX += size[0] - tabWidth
 
-        if self.tabShape == "Rectangle":
-            if self.tabBorderEnable:
-                thickness = self.tabBorderThickness
-                self.drawRect((tabX + thickness, tabY + thickness), (tabWidth - 2 * thickness,tabHeight - 2 * thickness), color)
-                self.drawRectBorder((tabX,tabY), (tabWidth,tabHeight), thickness, self.tabBorderColor)
-            else:
-                self.drawRect((tabX,tabY), (tabWidth,tabHeight), color)
-        elif self.tabShape == "RoundedRectangle":
-            
-            if self.tabBorderEnable:
-                thickness = self.tabBorderThickness
-                self.drawRoundedRect((tabX + thickness, tabY + thickness), (tabWidth - 2 * thickness,tabHeight - 2 * thickness), color, self.tabRadius)
-                self.drawRoundRectBorder((tabX,tabY), (tabWidth,tabHeight), self.tabBorderThickness, self.tabBorderColor, self.tabRadius)
-            else:
-                self.drawRoundedRect((tabX,tabY), (tabWidth,tabHeight), color, self.tabRadius)
-        else:
-            raise Exception("Requested Tab background shape not implemented!!! tabShape = {} is not a valid keyword.".format(self.tabShape))
+        tab = self.tabs[index]
+        graphic = self.tabGraphics[tab]
+        self._drawTabShape(graphic, (tabX, tabY), (tabWidth, tabHeight), highlight, index)
 
         # Display Text
-        tab = self.tabs[index]
         if tab in self.labels:
             tabLabel = self.labels[tab]
             tabLabel.text = ""
@@ -494,15 +1405,16 @@ class NavBar(Layout):
             tabLabel.size = tabWidth,tabHeight
 
         # Display Chevron
-        self.drawChevron([tabX, tabY], [tabWidth,tabHeight], self.chevronMargin, self.chevronWidth, isLeft, tab.textColor)
+        if self.batchRendering:
+            self._stripBatch.setChevron(isLeft, (tabX, tabY), (tabWidth, tabHeight), self.chevronMargin, self.chevronWidth, tab.textColor)
+            return
+        points = chevronPoints([tabX, tabY], [tabWidth,tabHeight], self.chevronMargin, self.chevronWidth, isLeft)
+        graphic.setChevron(points, self.chevronWidth, tab.textColor)
 
     ################################################ DATA MANIPULATION METHODS ################################################
 
     def _limit(self, value, min, max):
-        #if value is None: return None
-        if min is not None and value < min: value = min
-        elif max is not None and value > max: value = max
-        return value
+        return limit(value, min, max)
 
 if __name__ == '__main__':
 
@@ -552,16 +1464,15 @@ if __name__ == '__main__':
                 orientToTop=False,
                 valign="center"
             )
-            tab1 = NavBarTabBase(text="Tab 1", fontSize=20, halign='center', valign='center', bold=True, size=root.tabSize, pos=root.contentPos)
-            float1 = FloatLayout(size=tab1.size, pos=tab1.pos)
-            float1.add_widget(Label(text="Hello, World!", pos_hint={'center_x': 0.5, 'center_y': 0.5}))
-            tab1.add_widget(float1)        
-            tab2 = NavBarTabBase(text="Tab 2", fontSize=20, halign='center', valign='center', bold=True, size=root.tabSize, pos=root.contentPos)
-            float2 = FloatLayout(size=tab2.size, pos=tab2.pos)
-            float2.add_widget(Label(text="Goodbye!", pos_hint={'center_x': 0.5, 'center_y': 0.5}))
-            tab2.add_widget(float2)
-            root.add_widget(tab1)
-            root.add_widget(tab2)
+            def content(text):
+                def factory():
+                    floatLayout = FloatLayout()
+                    floatLayout.add_widget(Label(text=text, pos_hint={'center_x': 0.5, 'center_y': 0.5}))
+                    return floatLayout
+                return factory
+
+            root.add_tab("Tab 1", content("Hello, World!"), fontSize=20, halign='center', valign='center', bold=True)
+            root.add_tab("Tab 2", content("Goodbye!"), fontSize=20, halign='center', valign='center', bold=True)
             root.add_widget(NavBarTabBase(text="Tab 3", fontSize=20, halign='center', valign='center', bold=True))
             root.add_widget(NavBarTabBase(text="Tab 4", fontSize=20, halign='center', valign='center', bold=True))
             root.add_widget(NavBarTabBase(text="Tab 5", fontSize=20, halign='center', valign='center', bold=True))
@@ -0,0 +1,149 @@
+'''
+Vertex templates for the NavBar tab shapes.
+
+This module has no Kivy dependency. Templates are built at the origin in the
+(x, y, u, v) vertex format of kivy.graphics.Mesh and are cached on their
+dimensions, so every tab of the same size shares one tessellation and is only
+moved into place with a Translate.
+
+The *Triangles variants return the same shapes in the 'triangles' mode, so that
+many of them can be concatenated into a single Mesh.
+'''
+
+from functools import lru_cache
+from math import cos, sin, pi
+
+def chevronPoints(pos, size, margin, thickness, isleft):
+    '''
+    Returns the flattened [x0, y0, x1, y1, ...] line points of a chevron
+    pointing left (or right) inside the given box.
+    '''
+    x,y = pos
+    width,height = size
+    mw,mh = margin
+
+    xVerts = [x+mw, x+width-mw-thickness, x+width-mw, x+mw+thickness, x+width-mw, x+width-mw-thickness, x+mw]
+    yVerts = [y+height/2, y+height-mh, y+height-mh, y+height/2, y+mh, y+mh, y+height/2]
+
+    if isleft is False:
+        boundX = x + width/2
+        for i in range(len(xVerts)):
+            xVerts[i] = boundX - (xVerts[i] - boundX)
+
+    verts = xVerts + yVerts
+    verts[::2] = xVerts
+    verts[1::2] = yVerts
+    return verts
+
+def roundedOutline(x, y, width, height, radius, segments):
+    '''
+    Returns the counterclockwise outline points of a rounded rectangle, with
+    segments + 1 points per corner starting at the lower left corner.
+    '''
+    radius = max(0.0, min(radius, width / 2.0, height / 2.0))
+    segments = max(int(segments), 1)
+    corners = (
+        (x + radius, y + radius, pi),                           # Lower Left
+        (x + width - radius, y + radius, 1.5 * pi),             # Lower Right
+        (x + width - radius, y + height - radius, 0.0),         # Upper Right
+        (x + radius, y + height - radius, 0.5 * pi),            # Upper Left
+    )
+    step = 0.5 * pi / segments
+    points = []
+    for cx, cy, start in corners:
+        for i in range(segments + 1):
+            angle = start + i * step
+            points.append((cx + radius * cos(angle), cy + radius * sin(angle)))
+    return points
+
+@lru_cache(maxsize=64)
+def roundedRectMesh(width, height, radius, segments):
+    '''
+    Returns the (vertices, indices) of a filled rounded rectangle drawn with
+    the 'triangle_fan' mode.
+    '''
+    outline = roundedOutline(0.0, 0.0, width, height, radius, segments)
+    vertices = [width / 2.0, height / 2.0, 0.0, 0.0]
+    for px, py in outline:
+        vertices += [px, py, 0.0, 0.0]
+    # Close the fan on the first outline point
+    indices = list(range(len(outline) + 1)) + [1]
+    return vertices, indices
+
+@lru_cache(maxsize=64)
+def roundedRectBorderMesh(width, height, radius, thickness, segments):
+    '''
+    Returns the (vertices, indices) of a rounded rectangle border drawn with the
+    'triangle_strip' mode. The border matches a Line of the given width following
+    a rounded rectangle inset by thickness.
+    '''
+    outer = roundedOutline(0.0, 0.0, width, height, radius + thickness, segments)
+    inner = roundedOutline(2 * thickness, 2 * thickness, width - 4 * thickness, height - 4 * thickness,
+                           max(radius - thickness, 0.0), segments)
+    return ringMesh(outer, inner)
+
+def ringMesh(outer, inner):
+    '''
+    Returns the (vertices, indices) of the closed 'triangle_strip' between two
+    outlines with the same number of points.
+    '''
+    vertices = []
+    for (ox, oy), (ix, iy) in zip(outer, inner):
+        vertices += [ox, oy, 0.0, 0.0, ix, iy, 0.0, 0.0]
+    # Close the strip on the first pair of points
+    indices = list(range(len(outer) * 2)) + [0, 1]
+    return vertices, indices
+
+def fanToTriangles(indices):
+    return tuple(i for k in range(1, len(indices) - 1) for i in (indices[0], indices[k], indices[k + 1]))
+
+def stripToTriangles(indices):
+    return tuple(i for k in range(len(indices) - 2) for i in (indices[k], indices[k + 1], indices[k + 2]))
+
+@lru_cache(maxsize=64)
+def bodyTriangles(width, height, radius, segments):
+    '''
+    Returns the (vertices, indices) of a tab body, a plain rectangle if radius
+    is 0, in the 'triangles' mode.
+    '''
+    if radius <= 0:
+        return [0.0, 0.0, 0.0, 0.0, width, 0.0, 0.0, 0.0, width, height, 0.0, 0.0, 0.0, height, 0.0, 0.0], (0, 1, 2, 0, 2, 3)
+    vertices, indices = roundedRectMesh(width, height, radius, segments)
+    return vertices, fanToTriangles(indices)
+
+@lru_cache(maxsize=64)
+def borderTriangles(width, height, radius, thickness, segments):
+    '''
+    Returns the (vertices, indices) of a tab border, square if radius is 0, in
+    the 'triangles' mode.
+    '''
+    if radius <= 0:
+        outer = roundedOutline(0.0, 0.0, width, height, 0.0, 1)
+        inner = roundedOutline(2 * thickness, 2 * thickness, width - 4 * thickness, height - 4 * thickness, 0.0, 1)
+        vertices, indices = ringMesh(outer, inner)
+    else:
+        vertices, indices = roundedRectBorderMesh(width, height, radius, thickness, segments)
+    return vertices, stripToTriangles(indices)
+
+@lru_cache(maxsize=16)
+def chevronTriangles(width, height, marginX, marginY, thickness, isleft):
+    '''
+    Returns the (vertices, indices) of the chevron of a half tab, as one quad
+    per line segment in the 'triangles' mode.
+    '''
+    points = chevronPoints((0.0, 0.0), (width, height), (marginX, marginY), thickness, isleft)
+    vertices = []
+    indices = []
+    for k in range(0, len(points) - 2, 2):
+        x0, y0, x1, y1 = points[k:k + 4]
+        length = ((x1 - x0) ** 2 + (y1 - y0) ** 2) ** 0.5 or 1.0
+        nx, ny = (y0 - y1) / length * thickness, (x1 - x0) / length * thickness
+        base = len(vertices) // 4
+        vertices += [x0 + nx, y0 + ny, 0.0, 0.0, x0 - nx, y0 - ny, 0.0, 0.0,
+                     x1 - nx, y1 - ny, 0.0, 0.0, x1 + nx, y1 + ny, 0.0, 0.0]
+        indices += [base, base + 1, base + 2, base, base + 2, base + 3]
+    return vertices, tuple(indices)
+
+def cacheInfo():
+    return (roundedRectMesh.cache_info(), roundedRectBorderMesh.cache_info(),
+            bodyTriangles.cache_info(), borderTriangles.cache_info(), chevronTriangles.cache_info())
@@ -0,0 +1,127 @@
+'''
+Shared cache of rendered tab title textures.
+
+A Label rasterizes its text through the core text provider every time its text
+or style changes, even when the same title was rendered a moment ago. Tab labels
+are CachedLabels, which borrow the texture of an identical title from a
+TextureCache instead. The cache keeps the most recently used textures within a
+memory budget.
+
+The core text providers bake the text and outline colors into the texture, so
+both are part of the cache key like the other rendering options.
+'''
+
+from collections import OrderedDict
+from kivy.uix.label import Label
+from kivy.properties import ObjectProperty
+
+class TextureCache(object):
+    '''
+    LRU cache of text textures keyed on the text and rendering options of a core
+    label. maxBytes bounds the memory held by the cached textures, counted as 4
+    bytes per pixel.
+    '''
+
+    def __init__(self, maxBytes=8 * 1024 * 1024):
+        self.maxBytes = maxBytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._textures = OrderedDict()
+
+    @staticmethod
+    def key(coreLabel):
+        options = []
+        for name, value in sorted(coreLabel.options.items()):
+            # The text and text_size options are only updated on render, use
+            # the live values of the core label instead
+            if name in ('text', 'text_size'): continue
+            if isinstance(value, list):
+                value = tuple(value)
+            options.append((name, value))
+        return coreLabel.text, tuple(coreLabel.text_size), tuple(options)
+
+    def get(self, key):
+        entry = self._textures.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._textures.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, texture, isShortened=False):
+        old = self._textures.pop(key, None)
+        if old is not None:
+            self.size -= self._bytes(old[0])
+        self._textures[key] = texture, isShortened
+        self.size += self._bytes(texture)
+        self.trim(self.maxBytes)
+
+    def trim(self, maxBytes):
+        '''
+        Evicts the least recently used textures until the cache holds at most
+        maxBytes. Labels still showing an evicted texture keep it.
+        '''
+        textures = self._textures
+        while textures and self.size > maxBytes:
+            key, (texture, isShortened) = textures.popitem(last=False)
+            self.size -= self._bytes(texture)
+            self.evictions += 1
+
+    def clear(self):
+        self._textures.clear()
+        self.size = 0
+
+    def __len__(self):
+        return len(self._textures)
+
+    def _bytes(self, texture):
+        width, height = texture.size
+        return width * height * 4
+
+# Cache shared by every NavBar that does not use its own
+sharedTextureCache = TextureCache()
+
+class CachedLabel(Label):
+    '''
+    Label that takes its texture from textureCache when possible. Markup labels
+    embed their color in the texture and are always rendered.
+
+    instrumentation, if set, counts the renders and the cache hits.
+    '''
+    textureCache = ObjectProperty(None, allownone=True)
+    instrumentation = None
+
+    def texture_update(self, *largs):
+        cache = self.textureCache
+        coreLabel = self._label
+        stats = self.instrumentation
+        if not coreLabel.text or (self.halign == 'justify' or self.strip) and not coreLabel.text.strip():
+            # Nothing to rasterize, the Label only resets its texture
+            super(CachedLabel, self).texture_update(*largs)
+            return
+        if cache is None or self.markup:
+            if stats is not None: stats.count('labelRenders')
+            super(CachedLabel, self).texture_update(*largs)
+            return
+
+        key = cache.key(coreLabel)
+        entry = cache.get(key)
+        if entry is None:
+            if stats is not None: stats.count('labelRenders')
+            super(CachedLabel, self).texture_update(*largs)
+            texture = self.texture
+            if texture is not None and texture is not coreLabel.texture_1px:
+                cache.put(key, texture, self.is_shortened)
+                # The core label reuses its texture when the size matches, so
+                # let it render the next text into a new one
+                coreLabel.texture = None
+            return
+
+        if stats is not None: stats.count('labelCacheHits')
+        texture, isShortened = entry
+        self.texture = texture
+        self.texture_size = list(texture.size)
+        self.is_shortened = isShortened
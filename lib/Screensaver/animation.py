@@ -0,0 +1,84 @@
+'''
+Frame based animation driver shared by every animated widget.
+
+A single Clock event runs once per rendered frame while at least one animation
+is running and stops itself when the last one completes. Each animation
+interpolates from elapsed monotonic time, so its duration does not depend on the
+frame rate and the number of wakeups is bounded by it.
+'''
+
+import time
+from kivy.animation import AnimationTransition
+from kivy.clock import Clock
+
+def getEasing(easing):
+    '''
+    Returns the easing function for easing, which is either a function mapping
+    progress in [0, 1] to [0, 1] or the name of a kivy AnimationTransition.
+    '''
+    if callable(easing):
+        return easing
+    return getattr(AnimationTransition, easing)
+
+class AnimationDriver(object):
+
+    def __init__(self):
+        self._animations = {}
+        self._event = None
+        self._pausedAt = None
+
+    def animate(self, key, handler, duration, easing='linear'):
+        '''
+        Calls handler(progress) once per frame for duration seconds, with the
+        eased progress. The last call passes exactly 1.0. Animating a key that
+        is already running replaces its animation.
+        '''
+        self._animations[key] = (handler, time.monotonic(), duration, getEasing(easing))
+        if self._event is None and self._pausedAt is None:
+            self._event = Clock.schedule_interval(self._step, 0)
+
+    def stop(self, key):
+        self._animations.pop(key, None)
+
+    def isRunning(self, key):
+        return key in self._animations
+
+    def pause(self):
+        if self._pausedAt is not None: return
+        self._pausedAt = time.monotonic()
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+
+    def resume(self):
+        '''
+        Resumes the animations from where they were paused.
+        '''
+        if self._pausedAt is None: return
+        paused = time.monotonic() - self._pausedAt
+        self._pausedAt = None
+        for key, (handler, start, duration, easing) in list(self._animations.items()):
+            self._animations[key] = (handler, start + paused, duration, easing)
+        if self._animations and self._event is None:
+            self._event = Clock.schedule_interval(self._step, 0)
+
+    def _step(self, dt):
+        now = time.monotonic()
+        for key, animation in list(self._animations.items()):
+            if self._animations.get(key) is not animation:
+                # Stopped or replaced by an earlier handler of this frame
+                continue
+            handler, start, duration, easing = animation
+            progress = (now - start) / duration if duration > 0 else 1.0
+            if progress >= 1.0:
+                # Removed first, so the handler can start a new animation
+                del self._animations[key]
+                handler(1.0)
+            else:
+                handler(easing(progress))
+        if not self._animations:
+            self._event = None
+            return False
+
+# Driver shared by all animations
+animationDriver = AnimationDriver()
@@ -0,0 +1,70 @@
+'''
+Idle monitor shared by every Screensaver of the application.
+
+The monitor hooks the touch, mouse and keyboard events of the Window once. Input
+only updates a monotonic timestamp, and a single low frequency Clock event puts
+the Screensavers to sleep once the application has been idle for their
+sleepTime.
+'''
+
+import time
+import weakref
+from kivy.clock import Clock
+from kivy.core.window import Window
+
+class IdleMonitor(object):
+
+    def __init__(self, checkInterval=1.0):
+        self.checkInterval = checkInterval      # seconds
+        self.lastActivity = time.monotonic()
+        self._screensavers = weakref.WeakSet()
+        self._asleep = weakref.WeakSet()
+        self._checkEvent = None
+        self._hooked = False
+
+    def register(self, screensaver):
+        self._hook()
+        self._screensavers.add(screensaver)
+        if self._checkEvent is None:
+            self._checkEvent = Clock.schedule_interval(self._check, self.checkInterval)
+
+    def unregister(self, screensaver):
+        self._screensavers.discard(screensaver)
+        self._asleep.discard(screensaver)
+
+    def setAsleep(self, screensaver, asleep):
+        if asleep:
+            self._asleep.add(screensaver)
+        else:
+            self._asleep.discard(screensaver)
+
+    def activity(self, *largs):
+        '''
+        Records user activity and wakes the sleeping Screensavers.
+        '''
+        self.lastActivity = time.monotonic()
+        if self._asleep:
+            for screensaver in list(self._asleep):
+                screensaver._fadeOut()
+
+    def idleTime(self):
+        return time.monotonic() - self.lastActivity
+
+    def _hook(self):
+        if self._hooked: return
+        self._hooked = True
+        Window.fbind('on_motion', self.activity)
+        Window.fbind('on_key_down', self.activity)
+        Window.fbind('mouse_pos', self.activity)
+
+    def _check(self, dt):
+        if not self._screensavers:
+            self._checkEvent = None
+            return False
+        idle = self.idleTime()
+        for screensaver in list(self._screensavers):
+            if idle >= screensaver.sleepTime * 60:
+                screensaver._fadeIn()
+
+# Monitor shared by all Screensavers
+idleMonitor = IdleMonitor()
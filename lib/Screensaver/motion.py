@@ -0,0 +1,94 @@
+'''
+Bouncing sprites for the Screensaver.
+
+Every sprite shares one texture and all of them are drawn by a single Mesh. A
+step integrates the sprite positions over the elapsed time, so their speed does
+not depend on the frame rate, and uploads the vertex buffer once.
+'''
+
+from array import array
+import math
+import random
+from kivy.graphics import Mesh
+
+# Texture coordinates of the corners of an untextured sprite
+DEFAULT_TEX_COORDS = (0.0, 0.0, 1.0, 0.0, 1.0, 1.0, 0.0, 1.0)
+
+class SpriteBatch(object):
+    '''
+    count sprites of the given size, moving at speed pixels per second. The
+    first sprite starts in direction, in radians, and the others in random
+    directions. Positions are relative to the box the sprites bounce in.
+    '''
+
+    def __init__(self, count, size, speed, direction=None):
+        self.count = count = max(int(count), 0)
+        self.size = tuple(size)
+        self.mesh = Mesh(mode='triangles')
+        self.positions = array('f', bytes(8 * count))
+        self.velocities = array('f', bytes(8 * count))
+        self.vertices = array('f', bytes(64 * count))
+        self._placed = False
+
+        for i in range(count):
+            angle = direction if i == 0 and direction is not None else random.random() * 2 * math.pi
+            self.velocities[2 * i] = speed * math.cos(angle)
+            self.velocities[2 * i + 1] = speed * math.sin(angle)
+        self.setTexture(None)
+        self.mesh.indices = [base + offset for base in range(0, 4 * count, 4) for offset in (0, 1, 2, 0, 2, 3)]
+
+    def setTexture(self, texture):
+        self.mesh.texture = texture
+        texCoords = DEFAULT_TEX_COORDS if texture is None else texture.tex_coords
+        vertices = self.vertices
+        for corner in range(4):
+            u, v = texCoords[2 * corner], texCoords[2 * corner + 1]
+            vertices[2 + 4 * corner::16] = array('f', [u]) * self.count
+            vertices[3 + 4 * corner::16] = array('f', [v]) * self.count
+        self.mesh.vertices = vertices
+
+    def step(self, dt, pos, size):
+        '''
+        Moves the sprites by dt seconds inside the box at pos of size, bouncing
+        off its edges, and updates the Mesh.
+        '''
+        width, height = self.size
+        maxX = max(size[0] - width, 0.0)
+        maxY = max(size[1] - height, 0.0)
+        positions = self.positions
+        velocities = self.velocities
+        if not self._placed:
+            self._placed = True
+            for i in range(self.count):
+                positions[2 * i] = random.random() * maxX
+                positions[2 * i + 1] = random.random() * maxY
+
+        vertices = self.vertices
+        originX, originY = pos
+        for i in range(self.count):
+            x = positions[2 * i] + velocities[2 * i] * dt
+            y = positions[2 * i + 1] + velocities[2 * i + 1] * dt
+            # Reflect off the edges of the box
+            if x < 0.0:
+                x = min(-x, maxX)
+                velocities[2 * i] = abs(velocities[2 * i])
+            elif x > maxX:
+                x = max(2 * maxX - x, 0.0)
+                velocities[2 * i] = -abs(velocities[2 * i])
+            if y < 0.0:
+                y = min(-y, maxY)
+                velocities[2 * i + 1] = abs(velocities[2 * i + 1])
+            elif y > maxY:
+                y = max(2 * maxY - y, 0.0)
+                velocities[2 * i + 1] = -abs(velocities[2 * i + 1])
+            positions[2 * i] = x
+            positions[2 * i + 1] = y
+
+            left = originX + x
+            bottom = originY + y
+            base = 16 * i
+            vertices[base] = vertices[base + 12] = left
+            vertices[base + 4] = vertices[base + 8] = left + width
+            vertices[base + 1] = vertices[base + 5] = bottom
+            vertices[base + 9] = vertices[base + 13] = bottom + height
+        self.mesh.vertices = vertices
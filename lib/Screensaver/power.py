@@ -0,0 +1,64 @@
+'''
+Low power mode of the application while a Screensaver is asleep.
+
+While asleep the main loop is throttled to a low frame rate and every registered
+animation is paused. Waking restores the frame rate and resumes all of them in
+one call, before the next frame is drawn.
+'''
+
+import weakref
+from kivy.clock import Clock
+
+try:
+    from .animation import animationDriver
+except ImportError:
+    from animation import animationDriver
+
+class PowerManager(object):
+    '''
+    Registry of the animations to pause in low power mode. An animation is any
+    object with pause() and resume() methods.
+    '''
+
+    def __init__(self):
+        self._animations = weakref.WeakSet()
+        self._sleeping = False
+        self._maxFps = None
+
+    def register(self, animation):
+        self._animations.add(animation)
+        if self._sleeping:
+            animation.pause()
+
+    def unregister(self, animation):
+        self._animations.discard(animation)
+
+    def isSleeping(self):
+        return self._sleeping
+
+    def sleep(self, fps):
+        '''
+        Pauses the registered animations and limits the main loop to fps frames
+        per second, which must be positive.
+        '''
+        if fps <= 0:
+            # Kivy reads 0 as no frame rate limit at all
+            raise Exception("Low power frame rate must be positive!!! fps = {} is not a valid frame rate.".format(fps))
+        if self._sleeping: return
+        self._sleeping = True
+        for animation in list(self._animations):
+            animation.pause()
+        # Kivy reads the frame rate limit from Clock._max_fps on every frame
+        self._maxFps = Clock._max_fps
+        Clock._max_fps = float(fps)
+
+    def wake(self):
+        if not self._sleeping: return
+        self._sleeping = False
+        Clock._max_fps = self._maxFps
+        for animation in list(self._animations):
+            animation.resume()
+
+# Power manager shared by all Screensavers
+powerManager = PowerManager()
+powerManager.register(animationDriver)
@@ -13,7 +13,10 @@ from kivy.uix.label import Label
 from kivy.uix.widget import Widget
 from kivy.core.window import Window
 from kivy.clock import Clock
+from kivy.loader import Loader
+from kivy.logger import Logger
 import random
+import time
 import math
 from kivy.properties import (
     ListProperty,
@@ -24,9 +27,23 @@ from kivy.properties import (
     ReferenceListProperty,
     OptionProperty,
     ColorProperty,
-    DictProperty
+    DictProperty,
+    BoundedNumericProperty
 )
 
+try:
+    from .idle import idleMonitor
+    from .animation import animationDriver
+    from .power import powerManager
+    from .motion import SpriteBatch
+    from .slideshow import Slideshow
+except ImportError:
+    from idle import idleMonitor
+    from animation import animationDriver
+    from power import powerManager
+    from motion import SpriteBatch
+    from slideshow import Slideshow
+
 class Screensaver(Layout):
     color = ListProperty([0,1,0,1])
 
@@ -34,103 +51,257 @@ class Screensaver(Layout):
 
     fadeTime = NumericProperty(0.25)    # seconds
 
+    fadeEasing = ObjectProperty('linear')   # AnimationTransition name or function
+
+    lowPowerMode = BooleanProperty(False)   # throttle the app while asleep
+
+    sleepFps = BoundedNumericProperty(2, min=0.1)  # frames per second while asleep, 0 would uncap them
+
+    mode = OptionProperty('none', options=['none', 'sprites', 'slideshow'])
+
+    spriteSource = StringProperty('')       # image of the sprites, untextured if empty
+
+    spriteCount = NumericProperty(1)
+
+    spriteSize = ListProperty([64, 64])
+
+    spriteSpeed = NumericProperty(100)      # pixels per second
+
+    slides = ListProperty([])               # image sources of the slideshow
+
+    slideInterval = NumericProperty(10)     # seconds
+
+    prefetchCount = NumericProperty(2)      # slides decoded ahead
+
+    slideCacheSize = NumericProperty(64 * 1024 * 1024)  # bytes
+
+    instrumentation = ObjectProperty(None, allownone=True)  # counters and timers, off if None
+
     def __init__(self, **kwargs):
         super(Screensaver, self).__init__(**kwargs)
         #super(Screensaver, self).__init__()
         self._loaded = False
-        self._fadeAnimTime = 0
         self._animTime = 0
         self._fadeFlag = False
         self._stopAnimFlag = False
-        self.opacity = 0.0
+        self._fadeLevel = 0.0
         self.direction = random.random() * 2 * math.pi
         self._asleep = False
+        self._bgc = self.color
+
+        # Retained background, updated in place
+        self._backgroundColor = Color(rgba=self._bgc)
+        self._backgroundColor.a = 0.0
+        self._backgroundRect = Rectangle()
+        self.canvas.before.add(self._backgroundColor)
+        self.canvas.before.add(self._backgroundRect)
+
+        # Sprites or slides, created when the screen goes to sleep
+        self._contentColor = Color(1, 1, 1, 0)
+        self._content = InstructionGroup()
+        self.canvas.add(self._contentColor)
+        self.canvas.add(self._content)
+
+        # Not drawn at all while awake, fades only change the Color alphas
+        self.canvas.opacity = 0.0
+        self._sprites = None
+        self._slideshow = None
+        self._slideRect = None
+        self._contentEvent = None
+        self._lastStep = 0.0
 
+        # Opacity is applied by the canvas and needs no layout
         fbind = self.fbind
         update = self._trigger_layout
         fbind('size', update)
         fbind('pos', update)
-        fbind('_bgc', update)
-        fbind('color', update)
-        fbind('opacity', update)
+        fbind('color', self._updateColor)
+        fbind('slides', self._resetSlideshow)
+        fbind('prefetchCount', self._resetSlideshow)
+        fbind('slideCacheSize', self._resetSlideshow)
 
     def onLoad(self):
-        print("Loaded")
-        self._bgc = self.color
+        Logger.debug("Screensaver: Loaded")
+        self._updateColor()
         self._startSleepTimer()
 
-    def _fadeInHandler(self, dt) -> bool:
-        self._fadeAnimTime += dt
-        self.opacity = self._fadeAnimTime / self.fadeTime
-        if self.opacity >= 1.0:
-            self.opacity = 1.0
+    def _setFadeLevel(self, level):
+        self._fadeLevel = level
+        self._backgroundColor.a = self._bgc[3] * level
+        self._contentColor.a = level
+
+    def getStats(self):
+        '''
+        Returns a snapshot of the counters and timers of instrumentation, which
+        are empty if it is not set.
+        '''
+        if self.instrumentation is None:
+            return {'counters': {}, 'timers': {}}
+        return self.instrumentation.snapshot()
+
+    def _fadeInHandler(self, progress):
+        if self.instrumentation is not None: self.instrumentation.count('clock._fadeInHandler')
+        self._setFadeLevel(progress)
+        if progress >= 1.0:
             self._fadeFlag = False
             self._asleep = True
-            print("Asleep.")
-            return False
-        return True
-        
-    def _fadeOutHandler(self, dt) -> bool:
-        self._fadeAnimTime += dt
-        self.opacity = 1 - (self._fadeAnimTime / self.fadeTime)
-        if self.opacity <= 0.0:
-            self.opacity = 0.0
+            idleMonitor.setAsleep(self, True)
+            if self.lowPowerMode:
+                powerManager.sleep(self.sleepFps)
+            Logger.info("Screensaver: Asleep")
+
+    def _fadeOutHandler(self, progress):
+        if self.instrumentation is not None: self.instrumentation.count('clock._fadeOutHandler')
+        self._setFadeLevel(1.0 - progress)
+        if progress >= 1.0:
+            self.canvas.opacity = 0.0
             self._fadeFlag = False
             self._asleep = False
-            print("Awake.")
+            idleMonitor.setAsleep(self, False)
+            Logger.info("Screensaver: Awake")
+            self._stopContent()
             self._startSleepTimer()
-            return False
-        return True
 
     def _startSleepTimer(self):
+        '''
+        Registers with the shared idle monitor, which puts the screen to sleep
+        once the Window received no input for sleepTime minutes.
+        '''
         if self._asleep: return
-        print("Starting sleep timer.")
-        self._sleepTimer = Clock.schedule_once(lambda dt: self._fadeIn(), self.sleepTime * 60)
+        Logger.debug("Screensaver: Starting sleep timer")
+        idleMonitor.register(self)
 
     def resetSleep(self):
         '''
-        Call this function when the user does an action to keep the screen awake,
-        or to wake the screen after it goes to sleep.
+        Keeps the screen awake, or wakes it after it goes to sleep. Window input
+        already does this, call it for activity the Window does not see.
         '''
+        # Restart the idle time in both cases, or the next check puts a screen
+        # woken here straight back to sleep
+        Logger.debug("Screensaver: Resetting sleep timer")
+        idleMonitor.activity()
         if self._asleep:
             self._fadeOut()
-        else:
-            print("Resetting sleep timer...")
-            self._sleepTimer.cancel()
-            self._startSleepTimer()
 
     def _fadeIn(self) -> None:
         if self._fadeFlag or self._asleep: return
         self._fadeFlag = True
 
-        self._fadeAnimTime = 0.0
-        fadeResolution = 100
-        clockInterval = self.fadeTime / fadeResolution
-        Clock.schedule_interval(self._fadeInHandler, clockInterval)
-        print("Going to sleep...")
+        self._startContent()
+        self.canvas.opacity = 1.0
+        # Interpolated once per frame by the shared driver
+        animationDriver.animate(self, self._fadeInHandler, self.fadeTime, self.fadeEasing)
+        Logger.info("Screensaver: Going to sleep")
 
     def _fadeOut(self) -> None:
         if self._fadeFlag or (not self._asleep): return
         self._fadeFlag = True
         self._stopAnimFlag = True
 
-        self._fadeAnimTime = 0.0
-        fadeResolution = 100
-        clockInterval = self.fadeTime / fadeResolution
-        Clock.schedule_interval(self._fadeOutHandler, clockInterval)
-        print("Waking...")
+        # Restore the frame rate and resume every paused animation at once
+        powerManager.wake()
+        animationDriver.animate(self, self._fadeOutHandler, self.fadeTime, self.fadeEasing)
+        Logger.info("Screensaver: Waking")
+
+    def _startContent(self):
+        '''
+        Starts the sprites or the slideshow shown while the screen sleeps.
+        '''
+        self._stopContent()
+        content = self._content
+        if self.mode == 'sprites':
+            self._sprites = sprites = SpriteBatch(self.spriteCount, self.spriteSize, self.spriteSpeed, self.direction)
+            content.add(sprites.mesh)
+            if self.spriteSource:
+                image = Loader.image(self.spriteSource)
+                if image.loaded:
+                    sprites.setTexture(image.texture)
+                else:
+                    image.bind(on_load=lambda image: self._spriteLoaded(sprites, image))
+            self._lastStep = time.monotonic()
+            self._contentEvent = Clock.schedule_interval(self._stepSprites, 0)
+        elif self.mode == 'slideshow' and self.slides:
+            # Kept across sleeps, so the decoded slides stay cached
+            if self._slideshow is None:
+                self._slideshow = Slideshow(self.slides, self.prefetchCount, self.slideCacheSize)
+            self._slideRect = Rectangle()
+            content.add(self._slideRect)
+            self._slideshow.requestNext()
+            self._nextSlide(0)
+            # Attached after the first advance, slides already decoded would
+            # otherwise be shown by requestNext and skipped by the advance
+            self._slideshow.onLoad = self._slideLoaded
+            self._contentEvent = Clock.schedule_interval(self._nextSlide, self.slideInterval)
+        if self.instrumentation is not None: self.instrumentation.count('instructionsCreated', len(content.children))
+
+    def _stopContent(self):
+        if self._contentEvent is not None:
+            self._contentEvent.cancel()
+            self._contentEvent = None
+        if self.instrumentation is not None: self.instrumentation.count('instructionsDestroyed', len(self._content.children))
+        self._content.clear()
+        self._sprites = None
+        self._slideRect = None
+        if self._slideshow is not None:
+            self._slideshow.onLoad = None
 
-    def _drawRect(self, pos, size, color):
-        canvas = self.canvas.before
-        rect = InstructionGroup()
-        rect.add(Color(rgba=color))
-        rect.add(Rectangle(pos=pos, size=size))
-        canvas.add(rect)
+    def _resetSlideshow(self, *largs):
+        # Recreated with the new slides and budget, right away if it is shown
+        self._slideshow = None
+        if self._slideRect is not None:
+            self._startContent()
+
+    def _spriteLoaded(self, sprites, image):
+        if sprites is self._sprites:
+            sprites.setTexture(image.texture)
+
+    def _slideLoaded(self, source):
+        # Show the first slide as soon as it is decoded
+        if self._slideRect is not None and self._slideRect.texture is None:
+            self._nextSlide(0)
+
+    def _stepSprites(self, dt):
+        # Integrate over the measured time, frames may be throttled while asleep
+        if self.instrumentation is not None: self.instrumentation.count('clock._stepSprites')
+        now = time.monotonic()
+        elapsed = now - self._lastStep
+        self._lastStep = now
+        self._sprites.step(elapsed, self.pos, self.size)
+
+    def _nextSlide(self, dt):
+        if self.instrumentation is not None: self.instrumentation.count('clock._nextSlide')
+        texture = self._slideshow.advance()
+        if texture is not None:
+            self._slideRect.texture = texture
+            self._fitSlide()
+
+    def _fitSlide(self):
+        '''
+        Scales the slide to fit the screen, keeping its aspect ratio.
+        '''
+        rect = self._slideRect
+        if rect is None or rect.texture is None: return
+        x, y = self.pos
+        width, height = self.size
+        textureWidth, textureHeight = rect.texture.size
+        scale = min(width / float(textureWidth), height / float(textureHeight))
+        rect.size = textureWidth * scale, textureHeight * scale
+        rect.pos = x + (width - rect.size[0]) / 2, y + (height - rect.size[1]) / 2
 
     def _drawBackground(self):
-        self._drawRect(self.pos, self.size, self._bgc)
+        self._backgroundRect.pos = self.pos
+        self._backgroundRect.size = self.size
+
+    def _updateColor(self, *largs):
+        self._bgc = self.color
+        self._backgroundColor.rgba = self._bgc
+        self._backgroundColor.a = self._bgc[3] * self._fadeLevel
 
     def do_layout(self, *largs, **kwargs):
+        stats = self.instrumentation
+        if stats is not None:
+            stats.count('layouts')
+            stats.begin()
         if not self._loaded:
             self.onLoad()
             self._loaded = True
@@ -139,6 +310,11 @@ class Screensaver(Layout):
         width, height = self.size
 
         self._drawBackground()
+        if stats is not None: stats.lap('_drawBackground')
+        self._fitSlide()
+        if stats is not None:
+            stats.lap('_fitSlide')
+            stats.end('do_layout')
         
 if __name__ == '__main__':
     class KeyboardListener(Widget):
@@ -178,6 +354,9 @@ if __name__ == '__main__':
             )
             self.saver = Screensaver(
                 size_hint=(1.0,1.0),
+                mode='sprites',
+                spriteSource="testImage.png",
+                spriteCount=5,
                 pos_hint={'center_x': 0.5, 'center_y': 0.5}
             )
             self.background = Image(
@@ -192,8 +371,6 @@ if __name__ == '__main__':
 
         def _on_keyboard_down(self, keyboard, keycode, text, modifiers):
             super()._on_keyboard_down(keyboard, keycode, text, modifiers)
-            button = keycode[1]
-            self.saver.resetSleep()
             return False
 
     app = MainApp().run()
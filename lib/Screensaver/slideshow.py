@@ -0,0 +1,117 @@
+'''
+Slideshow for the Screensaver.
+
+Images are decoded by the kivy Loader worker threads, as AsyncImage does, and
+only their texture upload happens on the main thread. The next prefetch images
+are requested ahead of time and the decoded textures are kept in an LRU cache
+with a memory budget, so advancing never waits on disk I/O or decoding: if the
+next image is not ready yet, the current one stays up.
+'''
+
+from collections import OrderedDict
+from kivy.loader import Loader
+
+class TextureLRU(object):
+    '''
+    Textures keyed on their source, evicting the least recently used ones
+    once they hold more than maxBytes, counted as 4 bytes per pixel.
+    '''
+
+    def __init__(self, maxBytes):
+        self.maxBytes = maxBytes
+        self.size = 0
+        self._textures = OrderedDict()
+
+    def get(self, key):
+        texture = self._textures.get(key)
+        if texture is not None:
+            self._textures.move_to_end(key)
+        return texture
+
+    def put(self, key, texture):
+        old = self._textures.pop(key, None)
+        if old is not None:
+            self.size -= self._bytes(old)
+        self._textures[key] = texture
+        self.size += self._bytes(texture)
+        while len(self._textures) > 1 and self.size > self.maxBytes:
+            key, texture = self._textures.popitem(last=False)
+            self.size -= self._bytes(texture)
+
+    def __contains__(self, key):
+        return key in self._textures
+
+    def __len__(self):
+        return len(self._textures)
+
+    def _bytes(self, texture):
+        width, height = texture.size
+        return width * height * 4
+
+class Slideshow(object):
+    '''
+    Cycles through the images of sources. onLoad, if set, is called with the
+    source of every image once it is decoded.
+    '''
+
+    def __init__(self, sources, prefetch=2, maxBytes=64 * 1024 * 1024):
+        self.sources = list(sources)
+        self.prefetch = prefetch
+        self.cache = TextureLRU(maxBytes)
+        self.index = -1
+        self.onLoad = None
+        self._pending = {}
+
+    def current(self):
+        if not self.sources or self.index < 0:
+            return None
+        return self.cache.get(self.sources[self.index])
+
+    def advance(self):
+        '''
+        Moves to the next image if it is decoded and returns its texture, or
+        returns None and stays on the current image.
+        '''
+        if not self.sources:
+            return None
+        index = (self.index + 1) % len(self.sources)
+        texture = self.cache.get(self.sources[index])
+        if texture is not None:
+            self.index = index
+        self.requestNext()
+        return texture
+
+    def requestNext(self):
+        '''
+        Requests the decoding of the next prefetch images that are neither
+        cached nor already loading.
+        '''
+        count = len(self.sources)
+        for offset in range(1, min(int(self.prefetch), count) + 1):
+            source = self.sources[(self.index + offset) % count]
+            if source in self.cache or source in self._pending:
+                continue
+            image = Loader.image(source)
+            if image.loaded:
+                self._store(source, image)
+            else:
+                self._pending[source] = image
+                image.bind(on_load=lambda image, source=source: self._onLoad(source, image),
+                           on_error=lambda image, error, source=source: self._onError(source))
+
+    def _onLoad(self, source, image):
+        if self._pending.pop(source, None) is not None:
+            self._store(source, image)
+
+    def _onError(self, source):
+        # Skipped from now on, the slideshow moves past images that cannot load
+        self._pending.pop(source, None)
+        if source in self.sources:
+            self.sources.remove(source)
+            self.index = min(self.index, len(self.sources) - 1)
+
+    def _store(self, source, image):
+        if image.texture is not None:
+            self.cache.put(source, image.texture)
+            if self.onLoad is not None:
+                self.onLoad(source)
@@ -0,0 +1,67 @@
+'''
+Opt-in counters and phase timers of the NavBar and the Screensaver.
+
+A widget only records anything once an Instrumentation is assigned to its
+instrumentation property. Until then every probe is a single None check, so the
+widgets of a production build pay nothing for them. The widgets only call the
+methods of the object they are given, so one Instrumentation can be shared by
+several of them to aggregate their numbers.
+'''
+
+import time
+
+class Instrumentation(object):
+    '''
+    Named counters and timers. Phases are timed with laps: begin() starts a
+    pass and every lap(name) adds the time since the previous mark to the timer
+    of name.
+    '''
+
+    def __init__(self):
+        self.counters = {}
+        self.timers = {}
+        self._passStart = 0.0
+        self._mark = 0.0
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def begin(self):
+        self._passStart = self._mark = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self._record(name, now - self._mark)
+        self._mark = now
+
+    def end(self, name):
+        '''
+        Records the time since begin() under name.
+        '''
+        now = time.perf_counter()
+        self._record(name, now - self._passStart)
+        self._mark = now
+
+    def _record(self, name, elapsed):
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [1, elapsed, elapsed]
+        else:
+            timer[0] += 1
+            timer[1] += elapsed
+            if elapsed > timer[2]:
+                timer[2] = elapsed
+
+    def snapshot(self):
+        '''
+        Returns a copy of the counters and, for every timer, its number of
+        calls and their total, mean and longest duration in seconds.
+        '''
+        timers = {}
+        for name, (calls, total, longest) in self.timers.items():
+            timers[name] = {'calls': calls, 'total': total, 'mean': total / calls, 'max': longest}
+        return {'counters': dict(self.counters), 'timers': timers}
+
+    def reset(self):
+        self.counters.clear()
+        self.timers.clear()
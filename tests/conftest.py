@@ -0,0 +1,21 @@
+'''
+The packages are imported from lib, as the demos do. Kivy, when installed, is
+set up headless with the mock GL backend before any test imports it.
+'''
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'lib'))
+
+os.environ.setdefault('KIVY_GL_BACKEND', 'mock')
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+os.environ.setdefault('KIVY_NO_FILELOG', '1')
+
+try:
+    from kivy.graphics.cgl import cgl_init
+except ImportError:
+    pass
+else:
+    cgl_init()
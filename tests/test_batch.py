@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip('kivy')
+
+from kivy.graphics import Mesh
+from NavBar.batch import MAX_MESH_VERTICES, MeshBatch
+from NavBar.tessellation import bodyTriangles, borderTriangles
+
+def newBatch():
+    stats = {'created': 0, 'destroyed': 0}
+    return MeshBatch(stats), stats
+
+@pytest.mark.parametrize('template', [
+    bodyTriangles(100.0, 40.0, 10, 10),
+    borderTriangles(100.0, 40.0, 10, 2.0, 10),
+])
+def test_slots_are_split_over_meshes_within_16_bit_indices(template):
+    batch, stats = newBatch()
+    slots = 1500
+    batch.reserve(template, slots)
+    vertexCount = len(template[0]) // 4
+    assert len(batch.meshes) > 1
+    assert batch.slotsPerMesh * vertexCount <= MAX_MESH_VERTICES
+    assert sum(len(mesh.indices) for mesh in batch.meshes) == slots * len(template[1])
+    for mesh in batch.meshes:
+        assert max(mesh.indices) < MAX_MESH_VERTICES
+    assert stats['created'] == 1 + len(batch.meshes)
+
+def test_set_slot_writes_the_mesh_holding_it():
+    template = bodyTriangles(100.0, 40.0, 10, 10)
+    batch, stats = newBatch()
+    batch.reserve(template, 1500)
+    last = 1499
+    batch.setSlot(last, template, 1000.0, 5.0)
+    batch.flush()
+    mesh, slot = divmod(last, batch.slotsPerMesh)
+    start = slot * batch.slotSize
+    vertices = batch.meshes[mesh].vertices
+    assert vertices[start] == pytest.approx(template[0][0] + 1000.0)
+    assert vertices[start + 1] == pytest.approx(template[0][1] + 5.0)
+    batch.clearSlot(last)
+    batch.flush()
+    assert not any(batch.meshes[mesh].vertices[start:start + batch.slotSize])
+
+def test_shrinking_drops_the_extra_meshes():
+    template = bodyTriangles(100.0, 40.0, 10, 10)
+    batch, stats = newBatch()
+    batch.reserve(template, 1500)
+    meshes = len(batch.meshes)
+    batch.reserve(bodyTriangles(100.0, 40.0, 0, 10), 4)
+    assert len(batch.meshes) == 1
+    assert stats['destroyed'] == meshes - 1
+    assert [child for child in batch.group.children if isinstance(child, Mesh)] == batch.meshes
+
+def test_many_rounded_tabs_render_batched():
+    from NavBar.navbar import NavBar, NavBarTabBase
+    bar = NavBar(size_hint=(1, 1), tabShape="RoundedRectangle", tabBorderEnable=True,
+                 extendPastBounds=False, batchRendering=True)
+    bar.add_tabs([NavBarTabBase(text="Tab {}".format(i)) for i in range(1500)])
+    bar.do_layout()
+    normal = bar._stripBatch.normal
+    assert len(normal.meshes) > 1
+    assert sum(len(mesh.indices) for mesh in normal.meshes) // 3 >= 1499
+
+@pytest.mark.parametrize('shape', ["Rectangle", "RoundedRectangle"])
+def test_disabling_borders_clears_the_border_batch(shape):
+    from NavBar.navbar import NavBar, NavBarTabBase
+    bar = NavBar(size_hint=(1, 1), tabShape=shape, tabBorderEnable=True, batchRendering=True)
+    bar.add_tabs([NavBarTabBase(text="Tab {}".format(i)) for i in range(6)])
+    bar.do_layout()
+    border = bar._stripBatch.border
+    assert any(any(mesh.vertices) for mesh in border.meshes)
+    bar.tabBorderEnable = False
+    bar.do_layout()
+    assert not any(any(mesh.vertices) for mesh in border.meshes)
+    bar.tabBorderEnable = True
+    bar.do_layout()
+    assert any(any(mesh.vertices) for mesh in border.meshes)
@@ -0,0 +1,123 @@
+import pytest
+
+from NavBar import geometry
+from NavBar.geometry import (
+    HALF_LEFT, HALF_RIGHT, IN_BOUNDS, OUT_OF_BOUNDS,
+    calcTabSizeHint, classifyTab, hitTest, layoutTabs, originBounds, tabRange
+)
+
+BAR_SIZE = (800.0, 60.0)
+
+def makeLayout(numOfTabs, activeTab=0, extendPastBounds=True, batch=False, origin=None, valign='center'):
+    tabSpacing, tabSizeHint, tabSpacingHint = calcTabSizeHint(numOfTabs, 0.1, (None, 0.8), extendPastBounds)
+    return layoutTabs(numOfTabs, BAR_SIZE, tabSpacingHint, tuple(tabSizeHint), activeTab,
+                      extendPastBounds, valign, batch, origin)
+
+def bruteForceRange(layout, lowOrigin, highOrigin, steps=200):
+    seen = set()
+    width = BAR_SIZE[0]
+    for step in range(steps + 1):
+        origin = lowOrigin + (highOrigin - lowOrigin) * step / float(steps)
+        for index in range(layout.count):
+            tabX = origin + index * layout.pitch
+            if classifyTab(tabX, layout.width, width) != OUT_OF_BOUNDS:
+                seen.add(index)
+    return min(seen), max(seen)
+
+@pytest.mark.parametrize('tabX, expected', [
+    (10.0, IN_BOUNDS),
+    (0.0, IN_BOUNDS),
+    (700.0, IN_BOUNDS),
+    (-50.0, HALF_LEFT),
+    (750.0, HALF_RIGHT),
+    (-100.0, OUT_OF_BOUNDS),
+    (800.0, OUT_OF_BOUNDS),
+])
+def test_classify_tab(tabX, expected):
+    assert classifyTab(tabX, 100.0, 800.0) == expected
+
+def test_tabs_fit_in_bounds_when_not_extending():
+    layout = makeLayout(12, activeTab=7, extendPastBounds=False)
+    assert layout.origin == pytest.approx(layout.spacing)
+    assert list(layout.state) == [IN_BOUNDS] * 12
+    assert layout.x[-1] + layout.width + layout.spacing == pytest.approx(BAR_SIZE[0])
+
+def test_left_justified_on_first_tab():
+    layout = makeLayout(50, activeTab=0)
+    assert layout.origin == pytest.approx(layout.spacing)
+    assert layout.state[0] == IN_BOUNDS
+
+def test_center_justified_on_active_tab():
+    layout = makeLayout(50, activeTab=25)
+    assert layout.x[25] + layout.width / 2 == pytest.approx(BAR_SIZE[0] / 2)
+    assert layout.state[25] == IN_BOUNDS
+
+def test_right_justified_on_last_tab():
+    layout = makeLayout(50, activeTab=49)
+    assert layout.x[49] + layout.width + layout.spacing == pytest.approx(BAR_SIZE[0])
+
+def test_origin_overrides_justification():
+    layout = makeLayout(50, activeTab=25, origin=-1234.5)
+    assert layout.origin == -1234.5
+    assert layout.x[3] == pytest.approx(-1234.5 + 3 * layout.pitch)
+
+@pytest.mark.parametrize('valign, expected', [('bottom', 0.0), ('center', 6.0), ('top', 12.0)])
+def test_vertical_alignment(valign, expected):
+    assert makeLayout(5, valign=valign).y == pytest.approx(expected)
+
+def test_visible_are_the_tabs_in_bounds():
+    layout = makeLayout(50, activeTab=20)
+    states = list(layout.state)
+    assert list(layout.visible) == [index for index, state in enumerate(states) if state != OUT_OF_BOUNDS]
+    assert states[min(layout.visible) - 1] == OUT_OF_BOUNDS
+
+def test_layouts_are_memoized():
+    assert makeLayout(30, activeTab=3) is makeLayout(30, activeTab=3)
+
+@pytest.mark.skipif(geometry.numpy is None, reason="NumPy is not installed")
+@pytest.mark.parametrize('numOfTabs', [0, 1, 5, 50, 501])
+@pytest.mark.parametrize('extendPastBounds', [False, True])
+@pytest.mark.parametrize('where', ['first', 'middle', 'last', 'origin'])
+def test_batch_layout_matches_python_layout(numOfTabs, extendPastBounds, where):
+    activeTab = {'first': 0, 'middle': numOfTabs // 2, 'last': max(numOfTabs - 1, 0), 'origin': 0}[where]
+    origin = -321.0 if where == 'origin' else None
+    python = makeLayout(numOfTabs, activeTab, extendPastBounds, False, origin)
+    batch = makeLayout(numOfTabs, activeTab, extendPastBounds, True, origin)
+    assert isinstance(batch.x, geometry.numpy.ndarray)
+    assert batch.origin == python.origin
+    assert batch.pitch == python.pitch
+    assert list(batch.x) == pytest.approx(list(python.x))
+    assert list(batch.state) == list(python.state)
+    assert list(batch.visible) == list(python.visible)
+
+@pytest.mark.parametrize('batch', [False, True])
+def test_hit_test(batch):
+    if batch and geometry.numpy is None:
+        pytest.skip("NumPy is not installed")
+    layout = makeLayout(50, activeTab=25, batch=batch)
+    for index in layout.visible:
+        index = int(index)
+        assert hitTest(layout, float(layout.x[index]) + layout.width / 2) == index
+        assert hitTest(layout, float(layout.x[index])) == index
+        # The spacing after a tab belongs to no tab
+        assert hitTest(layout, float(layout.x[index]) + layout.width + layout.spacing / 2) is None
+    assert hitTest(layout, float(layout.x[0]) - 1.0) is None
+    assert hitTest(layout, float(layout.x[-1]) + layout.width + 1.0) is None
+
+def test_origin_bounds_match_justified_strips():
+    left = makeLayout(50, activeTab=0)
+    right = makeLayout(50, activeTab=49)
+    low, high = originBounds(50, BAR_SIZE[0], left.width, left.spacing)
+    assert high == pytest.approx(left.origin)
+    assert low == pytest.approx(right.origin)
+
+def test_origin_bounds_of_a_strip_shorter_than_the_bar():
+    layout = makeLayout(2, activeTab=0)
+    low, high = originBounds(2, BAR_SIZE[0], layout.width, layout.spacing)
+    assert low == high == pytest.approx(layout.spacing)
+
+@pytest.mark.parametrize('lowOrigin, highOrigin', [(-500.0, -500.0), (-3000.0, -200.0), (-10.0, 40.0)])
+def test_tab_range_matches_the_strip_positions(lowOrigin, highOrigin):
+    layout = makeLayout(50)
+    first, last = tabRange(50, BAR_SIZE[0], layout.width, layout.pitch, lowOrigin, highOrigin)
+    assert (first, last) == bruteForceRange(layout, lowOrigin, highOrigin)
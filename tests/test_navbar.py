@@ -0,0 +1,370 @@
+import time
+
+import pytest
+
+pytest.importorskip('kivy')
+
+from kivy.clock import Clock
+from kivy.graphics import Color
+from kivy.uix.widget import Widget
+from instrumentation import Instrumentation
+from NavBar.geometry import IN_BOUNDS
+from NavBar.navbar import NavBar, NavBarTabBase
+
+def frame():
+    '''
+    Runs one frame of the Clock like the event loop does, applying the
+    triggered layouts before the frame would be drawn.
+    '''
+    Clock.tick()
+    Clock.tick_draw()
+
+def newBar(count, **kwargs):
+    bar = NavBar(size_hint=(1.0, 1.0), **kwargs)
+    bar.add_tabs([NavBarTabBase(text="Tab {}".format(i)) for i in range(count)])
+    frame()
+    return bar
+
+MODES = {
+    'default': {},
+    'rounded': {'tabShape': "RoundedRectangle", 'tabBorderEnable': True},
+    'batchLayout': {'batchLayout': True, 'extendPastBounds': True},
+    'virtualize': {'virtualizeTabs': True, 'extendPastBounds': True},
+    'batchRendering': {'batchRendering': True, 'tabShape': "RoundedRectangle", 'tabBorderEnable': True},
+    'scrollTabs': {'scrollTabs': True, 'extendPastBounds': True, 'scrollDuration': 0},
+}
+
+@pytest.mark.parametrize('mode', sorted(MODES))
+def test_only_adding_and_removing_tabs_creates_instructions(mode):
+    bar = newBar(30, **MODES[mode])
+    # Scrolled to the middle, virtualized tabs bind the labels of a full window
+    bar.switch_tab(bar.tabs[15])
+    frame()
+    stats = bar.graphicsStats
+    before = dict(stats)
+
+    bar.do_layout()
+    for i in range(5):
+        bar.next()
+        frame()
+    for i in range(7):
+        bar.prev()
+        frame()
+    bar.size_hint = 0.5, 1.0
+    frame()
+    bar.size_hint = 1.0, 1.0
+    frame()
+    bar.tabColor = 0.5, 0.5, 0.5, 1
+    bar.highlightColor = 1, 1, 0, 1
+    bar.backgroundColor = 0, 0, 0, 1
+    frame()
+    assert stats == before
+
+    bar.add_tabs([NavBarTabBase(text="New {}".format(i)) for i in range(3)])
+    frame()
+    if mode != 'virtualize':
+        # Virtualized tabs only get instructions once they are drawn
+        assert stats['created'] > before['created']
+    bar.remove_widget(bar.getCurrent())
+    frame()
+    assert stats['destroyed'] > before['destroyed']
+
+def test_immediate_mode_helpers_add_one_group_per_call():
+    bar = NavBar(size_hint=(1.0, 1.0))
+    canvas = bar.canvas.before
+    count = len(canvas.children)
+    groups = [
+        bar.drawRect((0, 0), (40, 20), (1, 0, 0, 1)),
+        bar.drawRoundedRect((0, 0), (40, 20), (1, 0, 0, 1), 5),
+        bar.drawRectBorder((0, 0), (40, 20), 2, (1, 0, 0, 1)),
+        bar.drawRoundRectBorder((0, 0), (40, 20), 2, (1, 0, 0, 1), 5),
+        bar.drawChevron((0, 0), (40, 20), (5, 5), 2, True, (1, 0, 0, 1)),
+    ]
+    assert canvas.children[count:] == groups
+    for group in groups:
+        canvas.remove(group)
+    assert len(canvas.children) == count
+
+def test_virtualized_tabs_keep_a_flat_number_of_labels():
+    labelCounts = []
+    for count in (50, 5000):
+        bar = newBar(count, virtualizeTabs=True, extendPastBounds=True)
+        for index in (count // 2, count - 1, 0, count // 3):
+            bar.switch_tab(bar.tabs[index])
+            frame()
+            assert set(bar.labels) == set(bar.tabGraphics) == bar._drawnTabs
+            for tab in bar._drawnTabs:
+                # Only the tabs fully in bounds show their title
+                inBounds = bar._layout.state[bar._tabIndex[tab]] == IN_BOUNDS
+                assert bar.labels[tab].text == (tab.text if inBounds else "")
+        labelCounts.append(len(bar._labelStrip.children))
+    assert labelCounts[0] == labelCounts[1]
+
+def attachedTabs(bar):
+    return set(tab for tab in bar.tabs if tab.parent is bar)
+
+def test_inactive_tabs_are_detached():
+    bar = newBar(10, detachInactiveTabs=True)
+    tabs = list(bar.tabs)
+    assert attachedTabs(bar) == {tabs[0]}
+    bar.next()
+    frame()
+    assert attachedTabs(bar) == {tabs[1]}
+    assert tabs[0].parent is None
+
+def test_recently_used_tabs_stay_attached():
+    bar = newBar(10, detachInactiveTabs=True, tabCacheSize=2)
+    tabs = list(bar.tabs)
+    for index in range(1, 5):
+        bar.switch_tab(tabs[index])
+        frame()
+    assert attachedTabs(bar) == {tabs[2], tabs[3], tabs[4]}
+    assert tabs[2].opacity == tabs[3].opacity == 0.0
+    # Reattached when switched back to
+    bar.switch_tab(tabs[0])
+    frame()
+    assert tabs[0].parent is bar and tabs[0].opacity == 1.0
+
+def test_clearing_removes_detached_tabs():
+    bar = newBar(10, detachInactiveTabs=True)
+    bar.clear_widgets()
+    frame()
+    assert not bar.tabs and not bar.labels and not bar.tabGraphics and not bar._detachedTabs
+    assert bar._labelStrip.parent is bar
+
+def contentFactory(built, name):
+    def factory():
+        built.append(name)
+        return Widget()
+    return factory
+
+def test_tab_content_is_built_on_first_activation():
+    built = []
+    bar = NavBar(size_hint=(1.0, 1.0))
+    tabs = [bar.add_tab("Tab {}".format(i), contentFactory(built, i)) for i in range(5)]
+    assert built == []
+    frame()
+    assert built == [0]
+    bar.next()
+    frame()
+    bar.prev()
+    frame()
+    assert built == [0, 1]
+    assert len(tabs[1].children) == 1
+
+def test_neighbours_are_prebuilt_during_idle_frames():
+    built = []
+    bar = NavBar(size_hint=(1.0, 1.0), prebuildNeighbours=1)
+    for i in range(5):
+        bar.add_tab("Tab {}".format(i), contentFactory(built, i))
+    for i in range(3):
+        frame()
+    assert built == [0, 1]
+    bar.switch_tab(bar.tabs[3])
+    for i in range(3):
+        frame()
+    assert sorted(built) == [0, 1, 2, 3, 4]
+
+def test_factory_assigned_after_construction():
+    built = []
+    bar = newBar(2)
+    tab = NavBarTabBase(text="Late")
+    tab.factory = contentFactory(built, "late")
+    bar.add_widget(tab)
+    frame()
+    assert built == []
+    bar.switch_tab(tab)
+    frame()
+    assert built == ["late"]
+
+def test_bulk_registration_runs_one_layout():
+    bar = NavBar(size_hint=(1.0, 1.0), instrumentation=Instrumentation())
+    # Sized to the Window by its first layout
+    bar.do_layout()
+    frame()
+    bar.instrumentation.reset()
+    bar.add_tabs([NavBarTabBase(text="Tab {}".format(i)) for i in range(500)])
+    frame()
+    counters = bar.getStats()['counters']
+    assert counters['layouts'] == 1
+    assert counters['tabsDrawn'] == len(bar.tabs) == 500
+
+def test_tab_index_follows_insertions_and_removals():
+    bar = newBar(20)
+    tabs = list(bar.tabs)
+    bar.remove_widget(tabs[5])
+    bar.add_widget(NavBarTabBase(text="Added"))
+    bar.remove_widget(tabs[0])
+    frame()
+    assert len(bar._tabIndex) == len(bar.tabs) == 19
+    for index, tab in enumerate(bar.tabs):
+        assert bar._tabIndex[tab] == index
+
+@pytest.mark.parametrize('batchRendering', [False, True])
+def test_switch_without_scrolling_recolors_two_tabs(batchRendering):
+    bar = newBar(10, batchRendering=batchRendering, instrumentation=Instrumentation())
+    bar.instrumentation.reset()
+    for i in range(3):
+        bar.next()
+        frame()
+    counters = bar.getStats()['counters']
+    assert 'layouts' not in counters and 'tabsDrawn' not in counters
+    assert bar.activeTab == 3
+    if batchRendering:
+        assert bar._stripBatch.active == 3
+    else:
+        highlighted = [tab for tab, graphic in bar.tabGraphics.items() if graphic.highlight]
+        assert highlighted == [bar.tabs[3]]
+
+def test_navigation_is_coalesced_per_frame():
+    built = []
+    bar = NavBar(size_hint=(1.0, 1.0), coalesceNavigation=True)
+    for i in range(10):
+        bar.add_tab("Tab {}".format(i), contentFactory(built, i))
+    frame()
+    for i in range(5):
+        bar.next()
+    bar.prev()
+    assert bar.activeTab == 0
+    frame()
+    assert bar.activeTab == 4
+    # The tabs skipped over never built or showed their content
+    assert built == [0, 4]
+    assert [tab for tab in bar.tabs if tab.opacity] == [bar.tabs[4]]
+
+def test_content_swaps_are_rate_limited():
+    built = []
+    bar = NavBar(size_hint=(1.0, 1.0), coalesceNavigation=True, contentSwapInterval=1e6)
+    for i in range(10):
+        bar.add_tab("Tab {}".format(i), contentFactory(built, i))
+    frame()
+    bar.next()
+    frame()
+    bar.next()
+    frame()
+    # The highlight follows, the content stays until the interval passes
+    assert bar.activeTab == 2
+    assert bar._shownTab is bar.tabs[0]
+    assert built == [0]
+    bar._lastContentSwap = 0.0
+    bar._contentEvent.cancel()
+    bar._applyContentSwap(0)
+    assert bar._shownTab is bar.tabs[2]
+    assert built == [0, 2]
+
+def test_color_changes_do_not_layout():
+    bar = newBar(20, instrumentation=Instrumentation())
+    bar.instrumentation.reset()
+    bar.tabColor = 0.5, 0.5, 0.5, 1
+    bar.highlightColor = 1, 1, 0, 1
+    bar.tabBorderColor = 0, 0, 0, 1
+    bar.backgroundColor = 0, 0, 0, 1
+    bar.tabBackgroundColor = 0.2, 0.2, 0.2, 1
+    frame()
+    assert bar.getStats()['counters'] == {}
+    assert list(bar._tabColor.rgba) == [0.5, 0.5, 0.5, 1]
+    assert list(bar._highlightColor.rgba) == [1, 1, 0, 1]
+
+def test_tabs_share_the_colors_of_their_palette_role():
+    bar = newBar(20, tabBorderEnable=True)
+    for graphic in bar.tabGraphics.values():
+        for group in (graphic.body, graphic.border):
+            assert not any(isinstance(instruction, Color) for instruction in group.children)
+    assert bar._tabLayer.children[0] is bar._tabColor
+    assert bar._highlightLayer.children[0] is bar._highlightColor
+    assert bar._borderLayer.children[0] is bar._tabBorderColor
+
+def test_scrolling_moves_only_the_strip_translate():
+    bar = newBar(30, scrollTabs=True, extendPastBounds=True, scrollDuration=0)
+    bar.switch_tab(bar.tabs[10])
+    frame()
+    rect = bar.tabGraphics[bar.tabs[10]].bodyRect
+    pos = rect.pos
+    origin = bar.scrollX
+    bar.next()
+    frame()
+    assert bar.scrollX != origin
+    assert bar.scrollX == bar._layout.origin
+    assert bar._stripTranslate.x == bar._labelTranslate.x == bar.scrollX
+    # The tab geometry stays where it is in strip space
+    assert rect.pos == pos
+
+def test_animated_scroll_draws_the_tabs_in_the_bar():
+    bar = newBar(200, scrollTabs=True, extendPastBounds=True, scrollDuration=0.1, virtualizeTabs=True)
+    bar.switch_tab(bar.tabs[100])
+    frame()
+    bar.switch_tab(bar.tabs[140])
+    frame()
+    target = bar._layout.origin
+    while bar._scrollEvent is not None:
+        time.sleep(0.005)
+        frame()
+        first, last = bar._scrollWindow(bar.scrollX)
+        drawn = set(bar._tabIndex[tab] for tab in bar._drawnTabs)
+        assert drawn >= set(range(first, last + 1))
+        # Tabs are bound only around the bar, not over the whole scroll
+        assert len(drawn) <= last - first + 3
+    frame()
+    assert bar.scrollX == target
+    assert set(bar._tabIndex[tab] for tab in bar._drawnTabs) == set(bar._layout.visible)
+
+def test_tab_changes_reach_only_their_label():
+    bar = newBar(10, instrumentation=Instrumentation())
+    bar.instrumentation.reset()
+    tab = bar.tabs[2]
+    label = bar.labels[tab]
+    others = [(bar.labels[other].text, bar.labels[other].font_size) for other in bar.tabs if other is not tab]
+    tab.text = "Unread (3)"
+    tab.fontSize = 18
+    tab.textColor = 1, 0, 0, 1
+    tab.bold = True
+    tab.textSize = 80, None
+    tab.text = "Unread (4)"
+    frame()
+    assert label.text == "Unread (4)"
+    assert label.font_size == 18
+    assert list(label.color) == [1, 0, 0, 1]
+    assert label.bold
+    assert list(label.text_size) == [80, None]
+    assert others == [(bar.labels[other].text, bar.labels[other].font_size) for other in bar.tabs if other is not tab]
+    counters = bar.getStats()['counters']
+    # One merged update of the tab, without a layout pass
+    assert 'layouts' not in counters
+    assert counters['tabsDrawn'] == 1
+
+def test_transition_animates_the_two_tabs_on_one_event():
+    bar = newBar(5, transition='fade', transitionDuration=10)
+    tabs = bar.tabs
+    bar.next()
+    event = bar._transitionEvent
+    assert event is not None
+    assert (bar._transitionOut, bar._transitionIn) == (tabs[0], tabs[1])
+    # Halfway through
+    bar._transitionStart -= 5
+    bar._transitionStep(0)
+    assert 0.0 < tabs[1].canvas.opacity < 1.0
+    assert tabs[0].canvas.opacity == pytest.approx(1.0 - tabs[1].canvas.opacity)
+    bar._transitionStart -= 10
+    frame()
+    assert bar._transitionEvent is None
+    assert tabs[1].canvas.opacity == 1.0 and tabs[0].opacity == 0.0
+
+def test_transition_is_retargeted_instead_of_queued():
+    bar = newBar(5, transition='slide', transitionDuration=10)
+    tabs = bar.tabs
+    bar.next()
+    event = bar._transitionEvent
+    bar._transitionStart -= 2
+    # Going back reverses the transition from where it is
+    bar.prev()
+    assert bar._transitionEvent is event
+    assert (bar._transitionOut, bar._transitionIn) == (tabs[1], tabs[0])
+    assert bar._transitionProgress() == pytest.approx(0.8, abs=0.01)
+    # Rapid input keeps a single transition, to the last target
+    bar.next()
+    bar.next()
+    bar.next()
+    assert bar._transitionEvent is event
+    assert bar._transitionIn is tabs[3]
+    assert [tab for tab in tabs if tab.opacity] == [bar._transitionOut, tabs[3]]
+    bar._finishTransition()
@@ -0,0 +1,256 @@
+import pytest
+
+pytest.importorskip('kivy')
+
+from kivy.clock import Clock
+from kivy.graphics.texture import Texture
+from instrumentation import Instrumentation
+from Screensaver import slideshow
+from Screensaver.screensaver import Screensaver
+
+def frame():
+    '''
+    Runs one frame of the Clock like the event loop does, applying the
+    triggered layouts before the frame would be drawn.
+    '''
+    Clock.tick()
+    Clock.tick_draw()
+
+def newSaver(**kwargs):
+    saver = Screensaver(size_hint=(1.0, 1.0), sleepTime=1e6, fadeTime=0, **kwargs)
+    saver.size = 800, 600
+    frame()
+    return saver
+
+def sleepAndWake(saver):
+    saver._fadeIn()
+    frame()
+    saver._fadeOut()
+    frame()
+
+class LoadedImage(object):
+    loaded = True
+
+    def __init__(self, texture):
+        self.texture = texture
+
+class DecodedLoader(object):
+    '''
+    Loader whose images are all decoded already, like the kivy Loader once its
+    cache is warm.
+    '''
+
+    def __init__(self):
+        self.textures = {}
+        self.requests = []
+
+    def image(self, source):
+        self.requests.append(source)
+        if source not in self.textures:
+            self.textures[source] = Texture.create(size=(8, 4))
+        return LoadedImage(self.textures[source])
+
+@pytest.fixture
+def loader(monkeypatch):
+    loader = DecodedLoader()
+    monkeypatch.setattr(slideshow, 'Loader', loader)
+    return loader
+
+def test_slideshow_starts_on_the_first_slide(loader):
+    saver = Screensaver(mode='slideshow', slides=['a.png', 'b.png', 'c.png'])
+    saver._startContent()
+    assert saver._slideshow.index == 0
+    assert saver._slideRect.texture is loader.textures['a.png']
+    saver._stopContent()
+
+def test_decoded_slides_are_kept_across_sleeps(loader):
+    saver = Screensaver(mode='slideshow', slides=['a.png', 'b.png', 'c.png'], prefetchCount=3)
+    saver._startContent()
+    show = saver._slideshow
+    saver._stopContent()
+    requests = len(loader.requests)
+    saver._startContent()
+    assert saver._slideshow is show
+    assert len(loader.requests) == requests
+    # Continues from the slide shown before the wake
+    assert saver._slideRect.texture is loader.textures['b.png']
+    saver._stopContent()
+
+def test_new_slides_restart_the_slideshow(loader):
+    saver = Screensaver(mode='slideshow', slides=['a.png', 'b.png'])
+    saver._startContent()
+    saver.slides = ['c.png', 'd.png']
+    assert saver._slideRect.texture is loader.textures['c.png']
+    saver._stopContent()
+
+def test_background_is_retained_across_layouts_and_fades():
+    saver = newSaver()
+    counts = len(saver.canvas.before.children), len(saver.canvas.children)
+    for i in range(3):
+        saver.size = 400 + i, 300
+        frame()
+        sleepAndWake(saver)
+    assert (len(saver.canvas.before.children), len(saver.canvas.children)) == counts
+    assert saver._backgroundRect.size == (402, 300)
+
+def test_opacity_changes_do_not_layout():
+    saver = newSaver(instrumentation=Instrumentation())
+    layouts = saver.getStats()['counters']['layouts']
+    for opacity in (0.5, 0.0, 1.0):
+        saver.opacity = opacity
+        frame()
+    assert saver.getStats()['counters']['layouts'] == layouts
+
+@pytest.fixture
+def monitor():
+    from Screensaver.idle import idleMonitor
+    savers = []
+    yield idleMonitor, savers
+    for saver in savers:
+        idleMonitor.unregister(saver)
+    idleMonitor.activity()
+
+def test_idle_savers_share_one_check(monitor):
+    idleMonitor, savers = monitor
+    savers += [newSaver(), newSaver()]
+    event = idleMonitor._checkEvent
+    assert event is not None
+    for i in range(10):
+        idleMonitor.activity()
+    assert idleMonitor._checkEvent is event
+    assert idleMonitor.idleTime() < 1.0
+
+def test_window_input_only_records_activity(monitor):
+    from kivy.core.window import Window
+    idleMonitor, savers = monitor
+    savers.append(newSaver())
+    idleMonitor.lastActivity -= 100
+    Window.dispatch('on_key_down', 32, 0, ' ', [])
+    assert idleMonitor.idleTime() < 1.0
+    assert not savers[0]._fadeFlag
+
+def test_idle_deadline_puts_savers_to_sleep(monitor):
+    idleMonitor, savers = monitor
+    saver = newSaver()
+    saver.sleepTime = 1
+    savers.append(saver)
+    idleMonitor._check(0)
+    assert not saver._fadeFlag
+    idleMonitor.lastActivity -= 61
+    idleMonitor._check(0)
+    frame()
+    assert saver._asleep
+    # A wake restarts the idle time, so the next check keeps it awake
+    saver.resetSleep()
+    frame()
+    idleMonitor._check(0)
+    assert not saver._asleep and not saver._fadeFlag
+
+def test_one_driver_event_serves_every_fade():
+    from Screensaver.animation import AnimationDriver
+    driver = AnimationDriver()
+    progress = {'in': [], 'out': []}
+    driver.animate('in', progress['in'].append, 0.05, lambda t: t * t)
+    event = driver._event
+    driver.animate('out', progress['out'].append, 0.03, 'out_quad')
+    assert driver._event is event
+    frames = 0
+    while driver._event is not None:
+        frame()
+        frames += 1
+    for values in progress.values():
+        # At most once per frame, eased and ending exactly at 1.0
+        assert len(values) <= frames
+        assert values == sorted(values) and values[-1] == 1.0
+    assert progress['in'][0] == pytest.approx(0.0, abs=0.2)
+
+class Animation(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def pause(self):
+        self.calls.append('pause')
+
+    def resume(self):
+        self.calls.append('resume')
+
+def test_low_power_sleep_throttles_and_pauses():
+    from kivy.clock import Clock
+    from Screensaver.power import PowerManager
+    power = PowerManager()
+    animations = [Animation(), Animation()]
+    for animation in animations:
+        power.register(animation)
+    maxFps = Clock._max_fps
+    power.sleep(2)
+    try:
+        assert Clock._max_fps == 2.0
+        assert [animation.calls for animation in animations] == [['pause'], ['pause']]
+    finally:
+        power.wake()
+    assert Clock._max_fps == maxFps
+    assert [animation.calls for animation in animations] == [['pause', 'resume'], ['pause', 'resume']]
+
+def test_non_positive_frame_rates_are_rejected():
+    from Screensaver.power import PowerManager
+    with pytest.raises(Exception):
+        PowerManager().sleep(0)
+    with pytest.raises(ValueError):
+        Screensaver(sleepFps=0)
+
+def test_saver_sleeps_in_low_power_mode():
+    from Screensaver.power import powerManager
+    saver = newSaver(lowPowerMode=True, sleepFps=30)
+    saver._fadeIn()
+    frame()
+    assert saver._asleep and powerManager.isSleeping()
+    saver._fadeOut()
+    # Woken at once, before the fade out runs
+    assert not powerManager.isSleeping()
+    frame()
+    assert not saver._asleep
+
+def test_sprites_move_with_elapsed_time_in_one_mesh():
+    from Screensaver.motion import SpriteBatch
+    sprites = SpriteBatch(50, (10, 10), 100, 0.0)
+    assert len(sprites.mesh.indices) == 50 * 6
+    sprites.step(0.0, (0, 0), (10000, 10000))
+    # Away from the edges, so that no sprite bounces
+    for i in range(100):
+        sprites.positions[i] = 5000.0
+    start = list(sprites.positions)
+    sprites.step(0.5, (0, 0), (10000, 10000))
+    moved = [b - a for a, b in zip(start, sprites.positions)]
+    # The first sprite starts to the right at 100 pixels per second
+    assert moved[0] == pytest.approx(50.0, abs=1e-3) and moved[1] == pytest.approx(0.0, abs=1e-3)
+    for i in range(50):
+        assert (moved[2 * i] ** 2 + moved[2 * i + 1] ** 2) ** 0.5 == pytest.approx(50.0, rel=1e-4)
+
+def test_sprites_bounce_inside_the_box():
+    from Screensaver.motion import SpriteBatch
+    sprites = SpriteBatch(20, (10, 10), 500, 0.0)
+    for i in range(100):
+        sprites.step(0.1, (5, 5), (100, 80))
+        for x, y in zip(sprites.positions[0::2], sprites.positions[1::2]):
+            assert 0.0 <= x <= 90.0 and 0.0 <= y <= 70.0
+
+def test_fades_write_only_the_overlay_alphas():
+    from Screensaver.animation import animationDriver
+    saver = newSaver(instrumentation=Instrumentation(), color=[0, 0, 0, 0.8])
+    saver.fadeTime = 10
+    saver.instrumentation.reset()
+    opacities = []
+    saver.fbind('opacity', lambda *largs: opacities.append(saver.opacity))
+    saver._fadeIn()
+    saver._fadeInHandler(0.5)
+    assert saver._backgroundColor.a == pytest.approx(0.4)
+    assert saver._contentColor.a == pytest.approx(0.5)
+    animationDriver.stop(saver)
+    saver._fadeInHandler(1.0)
+    saver.fadeTime = 0
+    saver._fadeOut()
+    frame()
+    assert saver._backgroundColor.a == 0.0 and saver.canvas.opacity == 0.0
+    assert opacities == [] and saver.opacity == 1.0
+    assert 'layouts' not in saver.getStats()['counters']
@@ -0,0 +1,72 @@
+from math import pi
+
+import pytest
+
+from NavBar.tessellation import (
+    bodyTriangles, borderTriangles, chevronPoints, chevronTriangles, roundedRectBorderMesh, roundedRectMesh
+)
+
+def points(vertices):
+    return list(zip(vertices[0::4], vertices[1::4]))
+
+def trianglesArea(template):
+    vertices, indices = template
+    corners = points(vertices)
+    area = 0.0
+    for k in range(0, len(indices), 3):
+        (x0, y0), (x1, y1), (x2, y2) = (corners[i] for i in indices[k:k + 3])
+        area += abs((x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)) / 2.0
+    return area
+
+def assertValidTriangles(template):
+    vertices, indices = template
+    assert len(vertices) % 4 == 0
+    assert len(indices) % 3 == 0
+    assert 0 <= min(indices) and max(indices) < len(vertices) // 4
+
+@pytest.mark.parametrize('radius', [0, 10])
+def test_body_triangles_cover_the_tab(radius):
+    template = bodyTriangles(120.0, 40.0, radius, 32)
+    assertValidTriangles(template)
+    for x, y in points(template[0]):
+        assert -1e-9 <= x <= 120.0 + 1e-9 and -1e-9 <= y <= 40.0 + 1e-9
+    expected = 120.0 * 40.0 - (4 - pi) * radius ** 2
+    assert trianglesArea(template) == pytest.approx(expected, rel=1e-3)
+
+def test_radius_is_clamped_to_half_the_tab():
+    template = bodyTriangles(100.0, 20.0, 50, 64)
+    assert trianglesArea(template) == pytest.approx(100.0 * 20.0 - (4 - pi) * 10.0 ** 2, rel=1e-3)
+
+@pytest.mark.parametrize('radius', [0, 10])
+def test_border_triangles_cover_the_ring(radius):
+    width, height, thickness = 120.0, 40.0, 2.0
+    template = borderTriangles(width, height, radius, thickness, 32)
+    assertValidTriangles(template)
+    outerRadius = radius + thickness if radius else 0
+    innerRadius = max(radius - thickness, 0) if radius else 0
+    outer = width * height - (4 - pi) * outerRadius ** 2
+    inner = (width - 4 * thickness) * (height - 4 * thickness) - (4 - pi) * innerRadius ** 2
+    assert trianglesArea(template) == pytest.approx(outer - inner, rel=1e-2)
+
+def test_fan_and_strip_templates_match_their_triangles():
+    fanVertices, fanIndices = roundedRectMesh(120.0, 40.0, 10, 8)
+    assert bodyTriangles(120.0, 40.0, 10, 8)[0] is fanVertices
+    assert fanIndices[-1] == 1 and max(fanIndices) == len(fanVertices) // 4 - 1
+    stripVertices, stripIndices = roundedRectBorderMesh(120.0, 40.0, 10, 2.0, 8)
+    assert stripIndices[-2:] == [0, 1]
+    assert max(stripIndices) == len(stripVertices) // 4 - 1
+
+@pytest.mark.parametrize('isleft', [True, False])
+def test_chevron_triangles_follow_the_chevron(isleft):
+    template = chevronTriangles(60.0, 40.0, 20, 10, 5, isleft)
+    assertValidTriangles(template)
+    line = chevronPoints((0.0, 0.0), (60.0, 40.0), (20, 10), 5, isleft)
+    # One quad of two triangles per line segment
+    assert len(template[1]) == 6 * (len(line) // 2 - 1)
+    xs = [x for x, y in points(template[0])]
+    tip = min(xs) if isleft else max(xs)
+    assert tip == pytest.approx(min(line[0::2]) if isleft else max(line[0::2]), abs=5.0)
+
+def test_templates_are_shared():
+    assert bodyTriangles(80.0, 30.0, 5, 10) is bodyTriangles(80.0, 30.0, 5, 10)
+    assert borderTriangles(80.0, 30.0, 5, 2.0, 10) is borderTriangles(80.0, 30.0, 5, 2.0, 10)
@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip('kivy')
+
+from instrumentation import Instrumentation
+from NavBar.textcache import CachedLabel, TextureCache
+
+def renderedLabel(cache, **kwargs):
+    label = CachedLabel(textureCache=cache, **kwargs)
+    label.texture_update()
+    return label
+
+def test_same_title_and_style_share_a_texture():
+    cache = TextureCache()
+    first = renderedLabel(cache, text="Tab", color=(1, 0, 0, 1))
+    second = renderedLabel(cache, text="Tab", color=(1, 0, 0, 1))
+    assert second.texture is first.texture
+    assert cache.hits == 1
+
+def test_text_color_is_part_of_the_key():
+    cache = TextureCache()
+    red = renderedLabel(cache, text="Tab", color=(1, 0, 0, 1))
+    blue = renderedLabel(cache, text="Tab", color=(0, 0, 1, 1))
+    assert blue.texture is not red.texture
+
+def test_color_change_renders_a_new_texture():
+    cache = TextureCache()
+    label = renderedLabel(cache, text="Tab", color=(1, 0, 0, 1))
+    red = label.texture
+    label.color = (0, 1, 0, 1)
+    label.texture_update()
+    assert label.texture is not red
+
+def test_different_titles_do_not_share():
+    cache = TextureCache()
+    first = renderedLabel(cache, text="First")
+    second = renderedLabel(cache, text="Second")
+    assert second.texture is not first.texture
+    assert len(cache) == 2
+
+def test_trim_respects_the_memory_budget():
+    cache = TextureCache()
+    for i in range(5):
+        renderedLabel(cache, text="Tab {}".format(i))
+    size = cache.size
+    cache.trim(size // 2)
+    assert cache.size <= size // 2
+    assert cache.evictions > 0
+
+def test_text_size_change_renders_a_new_texture():
+    cache = TextureCache()
+    label = renderedLabel(cache, text="A title that wraps over several lines", text_size=(300, None))
+    wide = label.texture
+    label.text_size = (60, None)
+    label.texture_update()
+    assert label.texture is not wide
+    assert label.texture.width <= 60
+    assert label.texture.height > wide.height
+
+def test_only_rasterizations_are_counted_as_renders():
+    stats = Instrumentation()
+    label = CachedLabel(textureCache=TextureCache())
+    label.instrumentation = stats
+    # A tab scrolling out of bounds and back, twice
+    for text in ("Tab", "", "Tab", ""):
+        label.text = text
+        label.texture_update()
+    counters = stats.snapshot()['counters']
+    assert counters['labelRenders'] == 1
+    assert counters['labelCacheHits'] == 1